@@ -0,0 +1,162 @@
+"""Adaptive batch sizing for array-bound Oracle inserts.
+
+A fixed batch size suits either the campus LAN (low latency, smaller
+batches are fine) or a home VPN (every round trip is expensive, bigger
+batches win), never both. BatchTuner measures insert throughput for the
+first few batches, doubles the size while throughput keeps improving
+(or halves it if bigger batches do not help), and settles on the best
+size it saw, capped by a memory budget. A settled size still shrinks if
+throughput later collapses or rows prove larger than estimated.
+"""
+
+import logging
+import os
+import threading
+
+AUTOTUNE_ENABLED = os.environ.get("MIS_BATCH_AUTOTUNE", "1") == "1"
+MEMORY_BUDGET_MB = float(os.environ.get("MIS_BATCH_MEMORY_MB", "64"))
+
+# Rough Python-side cost of one bound value (str object + tuple/list slot)
+BYTES_PER_VALUE = 64
+
+
+def estimate_row_bytes(widths):
+    """Approximate in-memory size of one row from its column widths."""
+    return sum(widths) + BYTES_PER_VALUE * len(widths)
+
+
+class BatchTuner:
+    """Pick a batch size from measured insert throughput.
+
+    The caller asks next_size() before building a batch and reports the
+    database time for it with record(), passing the size the batch was built
+    with. Batches built ahead of a size change (a prefetching reader) are
+    ignored, so each size is judged on its own batches. The size doubles
+    while throughput improves; if the first doubling does not help it halves
+    instead while that helps. Once settled the size stays fixed unless
+    throughput drops well below the best seen or batches turn out bigger in
+    memory than estimated, in which case it shrinks, down to minimum.
+    """
+
+    def __init__(self, name, initial=1000, minimum=100, maximum=50000, row_bytes=256,
+                 memory_budget_mb=MEMORY_BUDGET_MB, probe_batches=8, enabled=AUTOTUNE_ENABLED,
+                 log=None):
+        self.name = name
+        self.minimum = minimum
+        self.row_bytes = max(row_bytes, 1)
+        self._budget_bytes = memory_budget_mb * 1024 * 1024
+        self._size_cap = max(minimum, maximum)
+        self.maximum = self._memory_cap()
+        self.size = self._clamp(initial)
+        self.probe_batches = probe_batches
+        self.enabled = enabled
+        self.settled = not enabled
+        self._log = log or logging.info
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._step = 2           # probe direction: 2 grows, 0.5 shrinks
+        self._best_rate = 0.0
+        self._best_size = self.size
+        self._initial = self.size
+        self._latencies = []
+        self._measured = 0       # full batches timed at the current size
+        self._slow = 0           # consecutive slow batches after settling
+
+    def _memory_cap(self):
+        return max(self.minimum, min(self._size_cap, int(self._budget_bytes // self.row_bytes)))
+
+    def _clamp(self, size):
+        return max(self.minimum, min(self.maximum, int(size)))
+
+    def next_size(self):
+        with self._lock:
+            return self.size
+
+    def _resize(self, size):
+        self.size = self._clamp(size)
+        self._measured = 0
+
+    def record(self, rows, seconds, size=None, bytes_used=None):
+        """
+        Report the round-trip time of a batch of rows.
+
+        size is what next_size() returned when the batch was built (default:
+        the current size); bytes_used, if known, is the batch's data size and
+        lowers the memory cap when rows are larger than estimated.
+        """
+        with self._lock:
+            if not self.enabled or seconds <= 0 or rows <= 0:
+                return
+            if bytes_used:
+                self._check_memory(rows, bytes_used)
+            size = self.size if size is None else size
+            # Built before the last size change, or a partial (final) batch
+            if size != self.size or rows < size // 2:
+                return
+            self._latencies.append(seconds)
+            self._measured += 1
+            rate = rows / seconds
+            if self.settled:
+                self._watch(rate)
+                return
+            self._batches += 1
+            if self._measured == 1 and self._batches == 1:
+                # First batch pays statement parse and buffer setup; measure again
+                return
+            if rate > self._best_rate * 1.05:
+                self._best_rate = rate
+                self._best_size = self.size
+                next_size = self._clamp(self.size * self._step)
+                if next_size == self.size:
+                    self._settle("reached memory/size cap" if self._step > 1 else "reached minimum size")
+                else:
+                    self._resize(next_size)
+            elif self._step > 1 and self._best_size == self._initial:
+                # Doubling did not help at all: try smaller batches than the starting size
+                self._step = 0.5
+                if self._best_size > self.minimum:
+                    self._resize(self._best_size // 2)
+                else:
+                    self._settle("no significant gain from larger batches")
+            else:
+                self._settle("no significant gain from " + ("larger" if self._step > 1 else "smaller") + " batches")
+            if not self.settled and self._batches >= self.probe_batches:
+                self._settle("probe finished")
+
+    def _watch(self, rate):
+        # Three full batches in a row at under half the best rate: the network or
+        # database slowed down, and a smaller batch holds less work in flight
+        if rate >= self._best_rate * 0.5:
+            self._slow = 0
+            return
+        self._slow += 1
+        if self._slow >= 3 and self.size > self.minimum:
+            old = self.size
+            self._resize(self.size // 2)
+            self._best_rate = rate
+            self._slow = 0
+            self._log(f"Batch size for {self.name} reduced from {old} to {self.size} rows "
+                      f"(throughput fell to {rate:,.0f} rows/sec)")
+
+    def _check_memory(self, rows, bytes_used):
+        row_bytes = bytes_used / rows
+        if row_bytes <= self.row_bytes:
+            return
+        self.row_bytes = row_bytes
+        self.maximum = self._memory_cap()
+        if self.size > self.maximum:
+            old = self.size
+            self._resize(self.maximum)
+            self._best_size = min(self._best_size, self.maximum)
+            self._log(f"Batch size for {self.name} reduced from {old} to {self.size} rows "
+                      f"(rows average {row_bytes:,.0f} bytes, over the memory budget)")
+
+    def _settle(self, reason):
+        self._resize(self._best_size)
+        self.settled = True
+        latency = sum(self._latencies) / len(self._latencies) if self._latencies else 0.0
+        self._log(
+            f"Batch size for {self.name} settled at {self.size} rows ({reason}; "
+            f"best {self._best_rate:,.0f} rows/sec, avg round trip {latency * 1000:.0f} ms, "
+            f"cap {self.maximum})"
+        )
@@ -1,5 +1,10 @@
 # Layout definitions (SP, SF, FA as starting point)
 
+from operator import itemgetter
+
+# DAT files are written by Banner/Windows tools as single-byte text
+DAT_ENCODING = "cp1252"
+
 LAYOUTS = {
     "AA": [
         ("GI90_RECORD_CODE", 0, 2),
@@ -464,3 +469,42 @@ LAYOUTS = {
         ("VR03_SERVICE_AMOUNT", 22, 28)
     ]    
 }
+
+
+class CompiledLayout:
+    """Fixed-width record parser built once per file type.
+
+    Slices every field of a record in one itemgetter call and returns a
+    positional tuple in layout order, ready to bind. Short (older format)
+    lines yield blank trailing fields, the same as slicing field by field.
+    """
+
+    def __init__(self, layout, encoding=DAT_ENCODING):
+        self.layout = layout
+        self.encoding = encoding
+        self.columns = [name for name, _, _ in layout]
+        self.widths = [end - start for _, start, end in layout]
+        self.record_length = layout[-1][2]
+        slices = [slice(start, end) for _, start, end in layout]
+        self._getter = itemgetter(*slices)
+        if len(slices) == 1:
+            # itemgetter with one item returns a bare value, not a tuple
+            self._getter = lambda line, _get=self._getter: (_get(line),)
+
+    def parse_text(self, line):
+        """Parse a decoded line into a tuple of stripped field values."""
+        return tuple([field.strip() for field in self._getter(line)])
+
+    def parse(self, line):
+        """Parse a raw bytes line into a tuple of stripped field values."""
+        return self.parse_text(line.decode(self.encoding, errors="replace"))
+
+
+_COMPILED = {}
+
+def get_compiled_layout(layout_key):
+    """Return the cached CompiledLayout for a file type, or None if there is no layout."""
+    compiled = _COMPILED.get(layout_key)
+    if compiled is None and layout_key in LAYOUTS:
+        compiled = _COMPILED[layout_key] = CompiledLayout(LAYOUTS[layout_key])
+    return compiled
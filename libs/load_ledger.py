@@ -0,0 +1,165 @@
+"""Ledger of file contents already loaded into the DWH.
+
+MIS_LOAD_LEDGER has one row per (target table, load scope) holding the
+sha256 of the file that last replaced that scope. The scope is the slice of
+the table a loader replaces: a term for the DAT files, a campus/term for the
+CSV extracts, a report number for error reports. A file whose hash is
+already the current one for a scope of its table has nothing new to load.
+
+Ledger rows are written on the loader's own connection and committed
+together with the data they describe. The ledger is read once per process
+and mirrored to load_ledger.json, which is used when the DWH table cannot
+be read. Set MIS_LOAD_LEDGER=0 to force full reloads.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from libs.schema_cache import table_exists, invalidate
+
+LEDGER_ENABLED = os.environ.get("MIS_LOAD_LEDGER", "1") == "1"
+LEDGER_TABLE = "MIS_LOAD_LEDGER"
+BASE_DIR = os.environ.get("MIS_INSTANCE_PATH", str(Path(__file__).parent.parent))
+CACHE_FILE = Path(BASE_DIR) / "load_ledger.json"
+
+_lock = threading.Lock()
+_entries = None   # "TABLE|scope" -> ledger entry
+
+MERGE_SQL = f"""
+    MERGE INTO {LEDGER_TABLE} l
+    USING (SELECT :tbl AS target_table, :scope AS load_scope FROM dual) s
+    ON (l.TARGET_TABLE = s.target_table AND l.LOAD_SCOPE = s.load_scope)
+    WHEN MATCHED THEN UPDATE SET
+        CONTENT_HASH = :sha256, FILE_NAME = :file_name, LOADER = :loader,
+        ROWS_LOADED = :rows_loaded, LOAD_SECONDS = :seconds, LOADED_AT = SYSDATE
+    WHEN NOT MATCHED THEN INSERT
+        (TARGET_TABLE, LOAD_SCOPE, CONTENT_HASH, FILE_NAME, LOADER, ROWS_LOADED, LOAD_SECONDS, LOADED_AT)
+        VALUES (:tbl, :scope, :sha256, :file_name, :loader, :rows_loaded, :seconds, SYSDATE)
+"""
+
+def file_sha256(path):
+    """Content hash of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _key(table, scope):
+    return f"{table.upper()}|{scope}"
+
+def ensure_ledger_table(cursor):
+    if table_exists(cursor, LEDGER_TABLE):
+        return
+    cursor.execute(f"""
+        CREATE TABLE {LEDGER_TABLE} (
+            TARGET_TABLE  VARCHAR2(128) NOT NULL,
+            LOAD_SCOPE    VARCHAR2(200) NOT NULL,
+            CONTENT_HASH  VARCHAR2(64) NOT NULL,
+            FILE_NAME     VARCHAR2(400),
+            LOADER        VARCHAR2(40),
+            ROWS_LOADED   NUMBER,
+            LOAD_SECONDS  NUMBER,
+            LOADED_AT     DATE,
+            CONSTRAINT {LEDGER_TABLE}_PK PRIMARY KEY (TARGET_TABLE, LOAD_SCOPE)
+        )
+    """)
+    invalidate(LEDGER_TABLE)
+    logging.info(f"Created table {LEDGER_TABLE}")
+
+def _read_cache():
+    if not CACHE_FILE.exists():
+        return {}
+    try:
+        with open(CACHE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable ledger cache {CACHE_FILE}: {e}")
+        return {}
+
+def _write_cache(entries):
+    tmp = CACHE_FILE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2, sort_keys=True)
+    os.replace(tmp, CACHE_FILE)
+
+def _load(cursor):
+    """Read the whole ledger (one query) into memory and refresh the local mirror."""
+    global _entries
+    try:
+        ensure_ledger_table(cursor)
+        cursor.execute(f"""
+            SELECT TARGET_TABLE, LOAD_SCOPE, CONTENT_HASH, FILE_NAME, LOADER,
+                   ROWS_LOADED, LOAD_SECONDS, TO_CHAR(LOADED_AT, 'YYYY-MM-DD HH24:MI:SS')
+            FROM {LEDGER_TABLE}
+        """)
+        entries = {}
+        for table, scope, sha256, file_name, loader, rows, seconds, loaded_at in cursor.fetchall():
+            entries[_key(table, scope)] = {
+                "table": table, "scope": scope, "sha256": sha256, "file": file_name,
+                "loader": loader, "rows": rows, "seconds": seconds, "loaded_at": loaded_at,
+            }
+        _write_cache(entries)
+    except Exception as e:
+        logging.warning(f"Could not read {LEDGER_TABLE} ({e}); using the local ledger cache")
+        entries = _read_cache()
+    _entries = entries
+
+def find_load(conn, table, content_hash):
+    """
+    Return the ledger entry if this content is the current load of one of the
+    table's scopes, otherwise None (always None when the ledger is disabled).
+    """
+    if not LEDGER_ENABLED:
+        return None
+    table = table.upper()
+    with _lock:
+        if _entries is None:
+            _load(conn.cursor())
+        for entry in _entries.values():
+            if entry["table"] == table and entry["sha256"] == content_hash:
+                return dict(entry)
+    return None
+
+def record_load(conn, table, scope, content_hash, file_name, loader, rows, seconds):
+    """
+    Record that a file's content is now the current load of a table scope
+    and commit it together with the caller's pending load.
+
+    A ledger write failure is logged rather than raised so it cannot fail the
+    load itself; the data is still committed. With the ledger disabled this
+    is just the commit.
+    """
+    if not LEDGER_ENABLED:
+        conn.commit()
+        return
+    table = table.upper()
+    scope = str(scope)
+    entry = {
+        "table": table, "scope": scope, "sha256": content_hash, "file": file_name,
+        "loader": loader, "rows": rows, "seconds": round(seconds, 3),
+        "loaded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    cursor = conn.cursor()
+    with _lock:
+        if _entries is None:
+            _load(cursor)
+    try:
+        cursor.execute(MERGE_SQL, {
+            "tbl": table, "scope": scope, "sha256": content_hash, "file_name": file_name,
+            "loader": loader, "rows_loaded": rows, "seconds": entry["seconds"],
+        })
+    except Exception as e:
+        logging.warning(f"Could not record {file_name} in {LEDGER_TABLE}: {e}")
+        entry = None
+    conn.commit()
+    # Only remember the load once it is committed
+    if entry is not None:
+        with _lock:
+            _entries[_key(table, scope)] = entry
+            _write_cache(_entries)
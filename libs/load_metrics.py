@@ -0,0 +1,195 @@
+"""Structured throughput metrics for the DWH loaders.
+
+Each loader run writes a JSON Lines file next to its log (one record per
+batch, per file and one for the run) and can print a short summary table,
+so runs for different terms can be compared.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+ROUND_TRIPS_SQL = """
+    SELECT m.value FROM v$mystat m
+    JOIN v$statname n ON m.statistic# = n.statistic#
+    WHERE n.name = 'SQL*Net roundtrips to/from client'
+"""
+
+def session_round_trips(conn):
+    """Round trips made by the connection's session so far, or None if v$mystat is not readable."""
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(ROUND_TRIPS_SQL)
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        return int(row[0]) if row else None
+    except Exception:
+        return None
+
+
+class FileMetrics:
+    """Timings and counters for one input file."""
+
+    def __init__(self, run, name, table=None, bytes_total=0):
+        self.run = run
+        self.name = name
+        self.table = table
+        self.bytes_total = bytes_total
+        self.bytes_read = 0
+        self.rows = 0
+        self.rejected = 0
+        self.batches = 0
+        self.round_trips = None
+        self.batch_size = None
+        self.phases = {}
+        self.status = "OK"
+        self.error = None
+        self._started = time.perf_counter()
+        self._round_trips_start = None
+        self.seconds = 0.0
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block and add it to the named phase."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started)
+
+    def start_round_trips(self, conn):
+        """Remember the session's round-trip count before the file is loaded."""
+        self._round_trips_start = session_round_trips(conn)
+
+    def stop_round_trips(self, conn):
+        """Record the round trips made since start_round_trips()."""
+        current = session_round_trips(conn)
+        if current is not None and self._round_trips_start is not None:
+            # Leave out the v$mystat query made for the measurement itself
+            self.round_trips = max(0, current - self._round_trips_start - 1)
+
+    def add_batch(self, rows, seconds, bytes_read=0, **timings):
+        """Record one batch; timings are extra per-phase seconds for the batch (e.g. insert=, commit=)."""
+        self.batches += 1
+        self.rows += rows
+        self.bytes_read += bytes_read
+        record = {
+            "type": "batch",
+            "file": self.name,
+            "batch": self.batches,
+            "rows": rows,
+            "seconds": round(seconds, 4),
+        }
+        for key, value in timings.items():
+            record[key] = round(value, 4)
+        self.run.write(record)
+
+    def fail(self, error):
+        self.status = "FAILED"
+        self.error = str(error)
+
+    def finish(self, rows=None):
+        """Close the file record and write it to the metrics file."""
+        self.seconds = time.perf_counter() - self._started
+        if rows is not None:
+            self.rows = rows
+        if not self.bytes_read:
+            self.bytes_read = self.bytes_total
+        self.run.write(self.as_record())
+        return self
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def as_record(self):
+        return {
+            "type": "file",
+            "file": self.name,
+            "table": self.table,
+            "status": self.status,
+            "error": self.error,
+            "rows": self.rows,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "bytes": self.bytes_read,
+            "seconds": round(self.seconds, 4),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "round_trips": self.round_trips,
+            "batch_size": self.batch_size,
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+        }
+
+
+class LoadMetrics:
+    """Collects FileMetrics for one loader run and writes them as JSON Lines."""
+
+    def __init__(self, loader, metrics_file):
+        self.loader = loader
+        self.metrics_file = metrics_file
+        self.files = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.write({"type": "run_start", "started": datetime.now().isoformat(timespec="seconds")})
+
+    def write(self, record):
+        record = {"loader": self.loader, **record}
+        line = json.dumps(record)
+        with self._lock:
+            with open(self.metrics_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def start_file(self, name, table=None, bytes_total=0):
+        file_metrics = FileMetrics(self, name, table, bytes_total)
+        with self._lock:
+            self.files.append(file_metrics)
+        return file_metrics
+
+    def finish(self, **extra):
+        """Write the run record and return the summary table lines."""
+        seconds = time.perf_counter() - self._started
+        rows = sum(f.rows for f in self.files)
+        self.write({
+            "type": "run",
+            "files": len(self.files),
+            "failed": sum(1 for f in self.files if f.status != "OK"),
+            "rows": rows,
+            "rejected": sum(f.rejected for f in self.files),
+            "bytes": sum(f.bytes_read for f in self.files),
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else 0.0,
+            **extra,
+        })
+        return self.summary_lines(seconds)
+
+    def summary_lines(self, seconds):
+        phase_names = []
+        for f in self.files:
+            for name in f.phases:
+                if name not in phase_names:
+                    phase_names.append(name)
+        header = f"{'File':<28}{'Rows':>12}{'MB':>9}{'Secs':>9}{'Rows/s':>10}{'Trips':>8}"
+        header += "".join(f"{name[:10]:>11}" for name in phase_names) + "  Status"
+        lines = [header, "-" * len(header)]
+        for f in sorted(self.files, key=lambda f: f.name):
+            trips = "-" if f.round_trips is None else str(f.round_trips)
+            line = (f"{f.name[:27]:<28}{f.rows:>12,}{f.bytes_read / 1048576:>9.1f}"
+                    f"{f.seconds:>9.1f}{f.rows_per_sec:>10,.0f}{trips:>8}")
+            line += "".join(f"{f.phases.get(name, 0.0):>11.1f}" for name in phase_names)
+            status = f"{f.status} ({f.rejected:,} rejected)" if f.rejected else f.status
+            lines.append(line + f"  {status}")
+        rows = sum(f.rows for f in self.files)
+        rate = rows / seconds if seconds > 0 else 0
+        total = f"Total: {len(self.files)} file(s), {rows:,} rows in {seconds:.1f}s ({rate:,.0f} rows/sec)"
+        rejected = sum(f.rejected for f in self.files)
+        if rejected:
+            total += f", {rejected:,} rows rejected"
+        lines.append(total)
+        return lines
@@ -1,6 +1,10 @@
 import oracledb
+import atexit
+import functools
 import logging
 import configparser
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 # ==== LOGGING SETUP ====
@@ -9,10 +13,20 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 # Update path to look in config folder
 CONFIG_PATH = Path(__file__).parent.parent / "config" / "config.ini"
 
-def read_config(section="dwh"):
-    """Read database configuration from config.ini"""
+_pools = {}
+_pools_lock = threading.Lock()
+_client_lock = threading.Lock()
+_client_initialized = False
+
+@functools.lru_cache(maxsize=None)
+def _load_config():
     config = configparser.ConfigParser()
     config.read(CONFIG_PATH)
+    return config
+
+def read_config(section="dwh"):
+    """Read database configuration from config.ini"""
+    config = _load_config()
     if section not in config:
         raise ValueError(f"Section [{section}] not found in config file.")
     return (
@@ -22,17 +36,121 @@ def read_config(section="dwh"):
     )
 
 def get_oracle_client_path():
-    config = configparser.ConfigParser()
-    config.read(CONFIG_PATH)
-    return config["oracle_client"]["path"]
+    return _load_config()["oracle_client"]["path"]
 
 def init_oracle_client():
+    """Load the Oracle client libraries once per process (falls back to Thin Mode)."""
+    global _client_initialized
+    with _client_lock:
+        if _client_initialized:
+            return
+        _client_initialized = True
+        try:
+            lib_dir = get_oracle_client_path()
+            oracledb.init_oracle_client(lib_dir=lib_dir)
+            logging.info(f"✅ Oracle Client Loaded from {lib_dir}")
+        except oracledb.DatabaseError as e:
+            logging.warning(f"⚠️ Running in Thin Mode. Error: {e}")
+
+def get_pool(section="dwh", pool_min=1, pool_max=5, pool_inc=1):
+    """
+    Return the process-wide connection pool for a config section, creating it on first use.
+
+    Later calls reuse the same pool; pool_min/max/inc only apply when the
+    pool is created. Pools are closed automatically at exit.
+
+    Returns:
+        oracledb ConnectionPool or None if the pool could not be created
+    """
+    with _pools_lock:
+        pool = _pools.get(section)
+        if pool is not None:
+            return pool
+        user, password, dsn = read_config(section)
+        init_oracle_client()
+        try:
+            pool = oracledb.create_pool(
+                user=user,
+                password=password,
+                dsn=dsn,
+                min=pool_min,
+                max=pool_max,
+                increment=pool_inc,
+            )
+        except oracledb.DatabaseError as e:
+            logging.error(f"❌ Error creating connection pool for {dsn}: {e}")
+            return None
+        logging.info(f"✅ Connection pool created successfully for {dsn} (max {pool_max})")
+        _pools[section] = pool
+        return pool
+
+@contextmanager
+def pooled_connection(section="dwh", **pool_args):
+    """
+    Acquire a connection from the section's pool and release it afterwards.
+
+    Uncommitted work is rolled back if the block raises.
+
+        with pooled_connection("dwh") as conn:
+            ...
+    """
+    pool = get_pool(section, **pool_args)
+    if pool is None:
+        raise ConnectionError(f"Could not create connection pool for [{section}]")
+    conn = pool.acquire()
     try:
-        lib_dir = get_oracle_client_path()
-        oracledb.init_oracle_client(lib_dir=lib_dir)
-        logging.info(f"✅ Oracle Client Loaded from {lib_dir}")
-    except oracledb.DatabaseError as e:
-        logging.warning(f"⚠️ Running in Thin Mode. Error: {e}")
+        yield conn
+    except Exception:
+        try:
+            conn.rollback()
+        except oracledb.DatabaseError:
+            pass
+        raise
+    finally:
+        pool.release(conn)
+
+def warm_up(section="dwh", connections=1, **pool_args):
+    """Open connections ahead of time so the first loads do not pay connect/auth latency."""
+    pool = get_pool(section, **pool_args)
+    if pool is None:
+        return False
+    acquired = []
+    try:
+        for _ in range(connections):
+            acquired.append(pool.acquire())
+    finally:
+        for conn in acquired:
+            pool.release(conn)
+    logging.info(f"Warmed up {len(acquired)} connection(s) for [{section}]")
+    return True
+
+def close_pools():
+    """Close every pool opened by this process (registered to run at exit)."""
+    with _pools_lock:
+        for section, pool in list(_pools.items()):
+            try:
+                pool.close(force=True)
+            except oracledb.Error as e:
+                logging.warning(f"⚠️ Could not close pool for [{section}]: {e}")
+        _pools.clear()
+
+atexit.register(close_pools)
+
+# Errors worth retrying: lost or reset sessions, deadlock, busy resource, listener hiccups
+TRANSIENT_ERRORS = {
+    "ORA-00054", "ORA-00060", "ORA-01033", "ORA-01089", "ORA-03113", "ORA-03114",
+    "ORA-03135", "ORA-12170", "ORA-12514", "ORA-12528", "ORA-12537", "ORA-12541",
+    "ORA-25408", "DPY-4011",
+}
+
+def is_transient_error(error):
+    """True if an Oracle error is likely to succeed when retried."""
+    if not isinstance(error, oracledb.Error) or not error.args:
+        return False
+    err = error.args[0]
+    if getattr(err, "isrecoverable", False):
+        return True
+    return getattr(err, "full_code", None) in TRANSIENT_ERRORS
 
 def get_connection(section="dwh", use_pool=False, pool_min=1, pool_max=5, pool_inc=1):
     """
@@ -42,39 +160,33 @@ def get_connection(section="dwh", use_pool=False, pool_min=1, pool_max=5, pool_i
         section (str): Config section to use. Options:
                       - "dwh" for Data Warehouse (DWHDB_DB) - used by dat_loader
                       - "prod" for Production (PROD_DB) - used by gvprmis_export
-        use_pool (bool): Whether to use connection pooling
+        use_pool (bool): Take the connection from the section's shared pool;
+                         conn.close() returns it to the pool
         pool_min/max/inc (int): Pool configuration parameters
     
     Returns:
         Oracle connection object or None if connection fails
     """
-    user, password, dsn = read_config(section)
-    init_oracle_client()
-    
     if use_pool:
-        try:
-            pool = oracledb.create_pool(
-                user=user,
-                password=password,
-                dsn=dsn,
-                min=pool_min,
-                max=pool_max,
-                increment=pool_inc,
-            )
-            logging.info(f"✅ Connection pool created successfully for {dsn}")
-            return pool.acquire()
-        except oracledb.DatabaseError as e:
-            logging.error(f"❌ Error creating connection pool for {dsn}: {e}")
+        pool = get_pool(section, pool_min, pool_max, pool_inc)
+        if pool is None:
             return None
-    else:
         try:
-            conn = oracledb.connect(user=user, password=password, dsn=dsn)
-            logging.info(f"✅ Connected to {dsn} as {user}")
-            return conn
+            return pool.acquire()
         except oracledb.DatabaseError as e:
-            logging.error(f"❌ Connection failed for {dsn}: {e}")
+            logging.error(f"❌ Could not acquire a pooled connection for [{section}]: {e}")
             return None
 
+    user, password, dsn = read_config(section)
+    init_oracle_client()
+    try:
+        conn = oracledb.connect(user=user, password=password, dsn=dsn)
+        logging.info(f"✅ Connected to {dsn} as {user}")
+        return conn
+    except oracledb.DatabaseError as e:
+        logging.error(f"❌ Connection failed for {dsn}: {e}")
+        return None
+
 # Example usage:
 if __name__ == "__main__":
     # Test DWH connection
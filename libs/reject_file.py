@@ -0,0 +1,70 @@
+"""Reject files for rows Oracle refuses during array inserts.
+
+With batch errors on, executemany() inserts every row it can and reports the
+ones it could not (value too large, invalid number, constraint violations)
+instead of failing the whole call. The loaders commit the good rows and
+write each refused row to a CSV next to their log, with its source line
+number and the Oracle error, so only those rows need fixing and reloading.
+
+A file with more than MIS_MAX_REJECTS refused rows is treated as bad input
+and fails as before.
+"""
+
+import csv
+import logging
+import os
+import re
+from collections import Counter
+
+MAX_REJECTS = int(os.environ.get("MIS_MAX_REJECTS", "1000"))
+
+def error_code(message):
+    """The ORA-nnnnn code at the start of an Oracle error message, or the message itself."""
+    match = re.match(r"(ORA-\d+)", message or "")
+    return match.group(1) if match else (message or "").strip()
+
+class RejectFile:
+    """CSV of rejected rows (LINE, ERROR, then the row's values), created on the first reject."""
+
+    def __init__(self, path, columns, max_rejects=MAX_REJECTS):
+        self.path = path
+        self.columns = list(columns)
+        self.max_rejects = max_rejects
+        self.count = 0
+        self.codes = Counter()
+        self._file = None
+        self._writer = None
+
+    def add(self, line_no, message, values):
+        """Write one rejected row; raises RuntimeError once there are more than max_rejects."""
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(["LINE", "ERROR"] + self.columns)
+        self._writer.writerow([line_no, message.strip()] + ["" if v is None else v for v in values])
+        self.count += 1
+        self.codes[error_code(message)] += 1
+        if self.count > self.max_rejects:
+            self.close()
+            raise RuntimeError(
+                f"More than {self.max_rejects} rows rejected (see {self.path}); "
+                "the input looks wrong rather than a few bad records"
+            )
+
+    def add_batch(self, errors, rows, line_numbers):
+        """Write the (offset, message) errors of one executemany; line_numbers[i] is the source line of rows[i]."""
+        for offset, message in errors:
+            self.add(line_numbers[offset], message, rows[offset])
+        return len(errors)
+
+    def summary(self):
+        """One line describing the rejects, e.g. "3 row(s) rejected (ORA-12899 x2, ORA-01722 x1)"."""
+        codes = ", ".join(f"{code} x{n}" for code, n in self.codes.most_common())
+        return f"{self.count} row(s) rejected ({codes}); see {self.path}"
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        logging.warning(self.summary())
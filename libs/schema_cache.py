@@ -0,0 +1,122 @@
+"""Process-wide cache of the DWH schema's tables, columns and partitions.
+
+The first lookup reads every table and column of the schema in one query;
+later lookups are answered from memory. Loaders call invalidate() after
+their own DDL so the next lookup re-reads just that table. A table missing
+from the snapshot is re-checked with a single-table query before it is
+reported as absent, so tables created by another process are still seen.
+
+All loaders connect to the same DWH schema, so the cache is not keyed by
+connection.
+"""
+
+import logging
+import threading
+
+_lock = threading.RLock()
+_columns = None      # TABLE_NAME -> {column name: (data type, data length)}
+_partitioned = {}    # TABLE_NAME -> True when the table is partitioned
+_partitions = {}     # TABLE_NAME -> set of partition names, loaded on demand
+_stale = set()       # tables whose DDL changed since they were cached
+
+_SCHEMA_SQL = """
+    SELECT t.table_name, t.partitioned, c.column_name, c.data_type, c.data_length
+    FROM user_tables t
+    LEFT JOIN user_tab_columns c ON c.table_name = t.table_name
+"""
+
+def _store(rows, tables=None):
+    """Add dictionary rows to the cache; tables lists names to forget first."""
+    for table in tables or ():
+        _columns.pop(table, None)
+        _partitioned.pop(table, None)
+    for table, partitioned, column, data_type, data_length in rows:
+        cols = _columns.setdefault(table, {})
+        _partitioned[table] = partitioned == "YES"
+        if column is not None:
+            cols[column] = (data_type, data_length)
+
+def _load_schema(cursor):
+    global _columns
+    cursor.execute(_SCHEMA_SQL)
+    _columns = {}
+    _store(cursor.fetchall())
+    logging.info(f"Cached dictionary metadata for {len(_columns)} table(s)")
+
+def _load_table(cursor, table):
+    cursor.execute(_SCHEMA_SQL + " WHERE t.table_name = :1", [table])
+    _store(cursor.fetchall(), tables=[table])
+    _stale.discard(table)
+
+def _lookup(cursor, table):
+    """Cached column types of a table, or None if the table does not exist."""
+    table = table.upper()
+    with _lock:
+        if _columns is None:
+            _load_schema(cursor)
+        if table in _stale or table not in _columns:
+            _load_table(cursor, table)
+        return _columns.get(table)
+
+def table_exists(cursor, table):
+    return _lookup(cursor, table) is not None
+
+def table_columns(cursor, table):
+    """Column names of a table (empty if it does not exist)."""
+    return set(_lookup(cursor, table) or ())
+
+def table_column_types(cursor, table):
+    """{column name: (data type, data length)} of a table (empty if it does not exist)."""
+    return dict(_lookup(cursor, table) or {})
+
+def is_partitioned(cursor, table):
+    if _lookup(cursor, table) is None:
+        return False
+    return _partitioned.get(table.upper(), False)
+
+def table_partitions(cursor, table):
+    """Partition names of a table, read once per table."""
+    table = table.upper()
+    with _lock:
+        if table not in _partitions:
+            cursor.execute(
+                "SELECT partition_name FROM user_tab_partitions WHERE table_name = :1",
+                [table]
+            )
+            _partitions[table] = {row[0] for row in cursor.fetchall()}
+        return set(_partitions[table])
+
+def add_columns(cursor, table, columns, column_type="VARCHAR2(4000)", quote=False, column_types=None):
+    """
+    Add the columns a table does not have yet with a single ALTER TABLE.
+
+    column_types can give a type per column; others get column_type.
+    Unquoted names are compared case-insensitively, quoted names exactly.
+    Returns the list of columns added.
+    """
+    existing = table_columns(cursor, table)
+    types = column_types or {}
+    if quote:
+        missing = [col for col in columns if col not in existing]
+        defs = [f'"{col}" {types.get(col, column_type)}' for col in missing]
+    else:
+        missing = [col for col in columns if col.upper() not in existing]
+        defs = [f"{col} {types.get(col, column_type)}" for col in missing]
+    if missing:
+        cursor.execute(f"ALTER TABLE {table} ADD ({', '.join(defs)})")
+        invalidate(table)
+    return missing
+
+def invalidate(table=None):
+    """Forget a table after DDL on it (or everything when table is None)."""
+    global _columns
+    with _lock:
+        if table is None:
+            _columns = None
+            _partitioned.clear()
+            _partitions.clear()
+            _stale.clear()
+            return
+        table = table.strip('"').upper()
+        _stale.add(table)
+        _partitions.pop(table, None)
@@ -0,0 +1,203 @@
+"""Column types for the tables the loaders create.
+
+Instead of VARCHAR2(4000) for every column, a table is created with
+VARCHAR2 columns sized from the longest value of a sample of its first
+file, with headroom; widen_to() enlarges them when later files need more.
+A sample cannot tell a number from a code that happens to be all digits
+(college, term and student IDs, the INFO_n fields of error reports), so
+columns are never made NUMBER or DATE from the data alone.
+
+NUMBER, DATE or a fixed size is chosen per table with
+config/column_types/<TABLE>.txt, one "COLUMN TYPE" pair per line ('#'
+starts a comment):
+
+    # MIS_TV_EXT
+    GI01 VARCHAR2(3)
+    SB00 VARCHAR2(9)
+    AMOUNT NUMBER
+
+Before binding, convert_frame turns a DataFrame's NUMBER and DATE columns
+into numbers and datetimes in vectorized form, driven by the table's actual
+column types, so existing all-VARCHAR2 tables keep receiving text.
+"""
+
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from libs.schema_cache import table_column_types, invalidate
+from libs.tabular_io import field_widths
+
+INFER_TYPES = os.environ.get("MIS_INFER_TYPES", "1") == "1"
+OVERRIDE_DIR = Path(__file__).parent.parent / "config" / "column_types"
+
+DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%m/%d/%Y", "%m/%d/%Y %H:%M:%S")
+VARCHAR_SIZES = (10, 20, 50, 100, 255, 500, 1000, 2000, 4000)
+# Text read back from a DataFrame that means "no value"
+MISSING_TEXT = ("", "nan", "None", "NaT")
+
+def read_overrides(table):
+    """{COLUMN: type} from the table's override file, if there is one."""
+    name = table.upper().strip('"')
+    path = OVERRIDE_DIR / f"{name}.txt"
+    if not path.exists():
+        return {}
+    overrides = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            column, _, column_type = line.partition(" ")
+            if column_type.strip():
+                overrides[column.upper()] = column_type.strip().upper()
+    return overrides
+
+def _present(series):
+    text = series[series.notna()].astype(str).str.strip()
+    return text[~text.isin(MISSING_TEXT)]
+
+def _varchar_size(width):
+    # Double the sampled width so later files with longer values still fit
+    for size in VARCHAR_SIZES:
+        if size >= width * 2:
+            return size
+    return VARCHAR_SIZES[-1]
+
+def _date_format(values):
+    for fmt in DATE_FORMATS:
+        if pd.to_datetime(values, format=fmt, errors="coerce").notna().all():
+            return fmt
+    return None
+
+def infer_type(series):
+    """VARCHAR2 sized for a sample of values; NUMBER and DATE only come from overrides."""
+    values = _present(series)
+    if values.empty:
+        return f"VARCHAR2({VARCHAR_SIZES[4]})"
+    return f"VARCHAR2({_varchar_size(values.str.encode('utf-8').str.len().max())})"
+
+def infer_column_types(table, sample, columns, text_columns=()):
+    """
+    {column: Oracle type} for new columns, from a sample DataFrame and any overrides.
+
+    Every inferred type is VARCHAR2; text_columns (the loader's delete keys)
+    get room for at least VARCHAR_SIZES[2] bytes so a longer key in a later
+    file does not need DDL.
+    """
+    overrides = read_overrides(table)
+    types = {}
+    for col in columns:
+        if str(col).upper() in overrides:
+            types[col] = overrides[str(col).upper()]
+        elif not INFER_TYPES:
+            types[col] = "VARCHAR2(4000)"
+        elif col in text_columns:
+            values = _present(sample[col])
+            width = values.str.encode("utf-8").str.len().max() if not values.empty else 0
+            types[col] = f"VARCHAR2({_varchar_size(max(int(width), VARCHAR_SIZES[2]))})"
+        else:
+            types[col] = infer_type(sample[col])
+    if overrides or INFER_TYPES:
+        logging.info(f"Column types for {table}: " + ", ".join(f"{col} {t}" for col, t in types.items()))
+    return types
+
+def _column_type(types, col):
+    return types.get(col) or types.get(str(col).upper()) or (None, None)
+
+def all_text(table_types, columns):
+    """True when no column is NUMBER or DATE, so values bind as read without conversion."""
+    return all(_column_type(table_types, col)[0] not in ("NUMBER", "DATE") for col in columns)
+
+def convert_frame(df, table_types, columns):
+    """
+    Copy of df[columns] with NUMBER and DATE columns converted for binding.
+
+    table_types is table_column_types() of the target table. Raises
+    ValueError naming the column when values do not fit its type.
+    """
+    frame = df[list(columns)].copy()
+    for col in columns:
+        data_type, _ = _column_type(table_types, col)
+        if data_type not in ("NUMBER", "DATE"):
+            continue
+        series = frame[col]
+        text = series.astype(str).str.strip()
+        missing = series.isna() | text.isin(MISSING_TEXT)
+        if data_type == "NUMBER":
+            converted = pd.to_numeric(text.where(~missing), errors="coerce")
+            # A leading zero means a code, which a number would silently lose
+            converted = converted.mask(text.str.match(r"^[+-]?0\d"))
+        else:
+            fmt = _date_format(text[~missing]) if (~missing).any() else DATE_FORMATS[0]
+            converted = pd.to_datetime(text.where(~missing), format=fmt, errors="coerce")
+        bad = converted.isna() & ~missing
+        if bad.any():
+            sample = ", ".join(repr(v) for v in text[bad].unique()[:3])
+            raise ValueError(
+                f"{int(bad.sum())} value(s) in column {col} are not valid for {data_type} (e.g. {sample}); "
+                f"set its type in {OVERRIDE_DIR.name}/<TABLE>.txt or alter the column"
+            )
+        frame[col] = converted.astype(object).where(~missing, None)
+    return frame
+
+def can_need_widening(table_types, path, columns):
+    """
+    False when no value of the file can be wider than the table's columns,
+    so the file need not be scanned for widths before loading.
+
+    columns are the table columns of the file's fields, in file order. For a
+    CSV the widest field at each position (field_widths) bounds its values;
+    other files, and columns the table does not have, always need a scan.
+    """
+    if not str(path).endswith(".csv"):
+        return True
+    for col, width in zip(columns, field_widths(path)):
+        data_type, length = _column_type(table_types, col)
+        if data_type is None or (data_type == "VARCHAR2" and width > length):
+            return True
+    return False
+
+def column_widths(df, columns, widths=None):
+    """
+    Longest value (in UTF-8 bytes) of each column, merged into widths.
+
+    Pass the result back in for every chunk or file to get the widths a
+    whole load needs before running any DDL for it.
+    """
+    widths = {} if widths is None else widths
+    for col in columns:
+        values = _present(df[col])
+        if not values.empty:
+            widths[col] = max(widths.get(col, 0), int(values.str.encode("utf-8").str.len().max()))
+    return widths
+
+def widen_to(cursor, table, widths, quote=False):
+    """
+    Enlarge VARCHAR2 columns narrower than widths ({column: bytes}) in one
+    ALTER TABLE. Returns the columns widened.
+
+    Like any DDL this commits the session's open transaction and waits for
+    other sessions' DML on the table (ORA-00054), so loaders call it once,
+    before their deletes and inserts start.
+    """
+    table_types = table_column_types(cursor, table)
+    changes = []
+    for col, width in widths.items():
+        data_type, length = _column_type(table_types, col)
+        if data_type != "VARCHAR2" or length >= VARCHAR_SIZES[-1]:
+            continue
+        if width > length:
+            name = f'"{col}"' if quote else col
+            changes.append((col, f"{name} VARCHAR2({_varchar_size(width)})"))
+    if changes:
+        cursor.execute(f"ALTER TABLE {table} MODIFY ({', '.join(defn for _, defn in changes)})")
+        invalidate(table)
+        logging.info(f"Widened {', '.join(col for col, _ in changes)} on {table}")
+    return [col for col, _ in changes]
+
+def widen_columns(cursor, table, df, columns, quote=False):
+    """Enlarge VARCHAR2 columns that are too narrow for this frame's values (see widen_to)."""
+    return widen_to(cursor, table, column_widths(df, columns), quote=quote)
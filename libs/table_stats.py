@@ -0,0 +1,124 @@
+"""Post-load optimizer statistics for the tables a loader run touched.
+
+After a term is bulk-replaced the DWH statistics describe the old data, and
+queries pick bad plans until the nightly stats job runs. PostLoadStats
+records which tables (and term partitions) a run changed and, once their
+loads have committed, gathers table and index statistics for just those
+in background threads on pooled connections. Partitioned tables are switched
+to incremental statistics, so only the touched partitions are scanned and
+the global statistics are derived from the partition synopses.
+
+The stage is optional: set MIS_POSTLOAD_STATS=1 to enable it.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from libs.oracle_db_connector import pooled_connection
+from libs.schema_cache import is_partitioned, table_partitions
+
+STATS_ENABLED = os.environ.get("MIS_POSTLOAD_STATS", "0") == "1"
+# Tables gathered at once
+STATS_WORKERS = int(os.environ.get("MIS_STATS_WORKERS", "2"))
+# Parallel degree for the gather; unset uses the table's own DEGREE
+STATS_DEGREE = os.environ.get("MIS_STATS_DEGREE")
+
+INCREMENTAL_SQL = """
+    BEGIN
+        DBMS_STATS.SET_TABLE_PREFS(USER, :tbl, 'INCREMENTAL', 'TRUE');
+    END;
+"""
+
+GATHER_SQL = """
+    BEGIN
+        DBMS_STATS.GATHER_TABLE_STATS(
+            ownname => USER, tabname => :tbl, partname => :part,
+            granularity => 'AUTO', cascade => TRUE, degree => :degree);
+    END;
+"""
+
+class PostLoadStats:
+    """Collects touched tables during a run and gathers their statistics in the background."""
+
+    def __init__(self, loader, section="dwh", enabled=STATS_ENABLED, workers=STATS_WORKERS,
+                 degree=STATS_DEGREE, log=logging.info):
+        self.loader = loader
+        self.section = section
+        self.enabled = enabled
+        self.workers = max(1, workers)
+        self.degree = int(degree) if degree else None
+        self.log = log
+        self._touched = {}      # TABLE -> set of partition names (None for the whole table)
+        self._futures = []
+        self._executor = None
+        self._started = None
+        self._lock = threading.Lock()
+
+    def touch(self, table, partition=None):
+        """Note that a committed load changed a table (or one of its partitions)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._touched.setdefault(table.upper().strip('"'), set()).add(partition)
+
+    def gather(self, table=None):
+        """Start gathering statistics for one touched table, or all of them, in the background."""
+        if not self.enabled:
+            return
+        with self._lock:
+            names = [table.upper().strip('"')] if table else list(self._touched)
+            jobs = [(name, self._touched.pop(name)) for name in names if name in self._touched]
+            if not jobs:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stats")
+                self._started = time.perf_counter()
+            for name, partitions in jobs:
+                self._futures.append(self._executor.submit(self._gather_table, name, partitions))
+
+    def _gather_table(self, table, partitions):
+        started = time.perf_counter()
+        try:
+            with pooled_connection(self.section) as conn:
+                cursor = conn.cursor()
+                targets = [None]
+                if is_partitioned(cursor, table):
+                    existing = table_partitions(cursor, table)
+                    named = sorted(p for p in partitions if p and p.upper() in existing)
+                    # A whole-table touch means any partition may have changed, so gather them all
+                    if named and None not in partitions:
+                        targets = named
+                    cursor.execute(INCREMENTAL_SQL, tbl=table)
+                for part in targets:
+                    cursor.execute(GATHER_SQL, tbl=table, part=part, degree=self.degree)
+                cursor.close()
+        except Exception as e:
+            return table, None, time.perf_counter() - started, e
+        return table, [p for p in targets if p], time.perf_counter() - started, None
+
+    def wait(self):
+        """Wait for the background gathers, log their timings and return the summary lines."""
+        if self._executor is None:
+            return []
+        lines = []
+        for future in self._futures:
+            table, parts, seconds, error = future.result()
+            if error is not None:
+                line = f"Statistics for {table} failed after {seconds:.1f}s: {error}"
+            elif parts:
+                line = f"Statistics for {table} partition(s) {', '.join(parts)} gathered in {seconds:.1f}s"
+            else:
+                line = f"Statistics for {table} gathered in {seconds:.1f}s"
+            self.log(line)
+            lines.append(line)
+        self._executor.shutdown()
+        total = time.perf_counter() - self._started
+        line = f"{self.loader}: post-load statistics for {len(self._futures)} table(s) finished {total:.1f}s after the first gather started"
+        self.log(line)
+        lines.append(line)
+        self._executor = None
+        self._futures = []
+        return lines
@@ -0,0 +1,276 @@
+"""Chunked CSV/XLSX reading and writing for the external-file loaders.
+
+The state and third-party extracts can be several hundred MB. Reading them
+whole with pd.read_csv/pd.read_excel, then converting and annotating copies,
+holds the data several times over. read_chunks yields DataFrames of at most
+CHUNK_ROWS rows (CSV through pandas' chunked reader, XLSX through a
+read-only openpyxl workbook), and ChunkWriter writes the annotated output one
+chunk at a time, so peak memory depends on the chunk size rather than the
+file size.
+
+insert_frame sends a DataFrame to Oracle without first turning it into a
+Python list per row: through python-oracledb's data frame ingestion (Arrow
+PyCapsule interface) where the driver and pandas support it, otherwise
+through rows zipped from whole columns with bind sizes declared up front.
+"""
+
+import logging
+import math
+import os
+import time
+
+import numpy as np
+import oracledb
+import pandas as pd
+
+CHUNK_ROWS = int(os.environ.get("MIS_CSV_CHUNK_ROWS", "50000"))
+# Set MIS_ARROW_INSERT=0 to always use the row-bind fallback
+ARROW_INSERT = os.environ.get("MIS_ARROW_INSERT", "1") == "1"
+
+def _xlsx_value(value, as_text):
+    # Excel stores every number as a float; whole numbers read back as ints like pd.read_excel
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if as_text and value is not None:
+        return str(value)
+    return value
+
+def _xlsx_chunks(path, chunk_rows, as_text):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        # pd.read_excel reads the first sheet
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        width = len(header)
+        chunk = []
+        # Like pd.read_excel, blank rows between data rows are kept and trailing ones dropped
+        blank = 0
+        for row in rows:
+            if all(value is None for value in row):
+                blank += 1
+                continue
+            for _ in range(blank):
+                chunk.append([None] * width)
+            blank = 0
+            values = [_xlsx_value(value, as_text) for value in row[:width]]
+            values.extend([None] * (width - len(values)))
+            chunk.append(values)
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=header).fillna(math.nan)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header).fillna(math.nan)
+    finally:
+        workbook.close()
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS, as_text=False, encoding=None):
+    """
+    Yield an input file as DataFrames of at most chunk_rows rows.
+
+    as_text reads every cell as a string, with NaN for empty cells, like
+    dtype=str. Files other than .csv/.xlsx raise ValueError.
+    """
+    path = str(path)
+    if path.endswith(".csv"):
+        kwargs = {"dtype": str} if as_text else {}
+        with pd.read_csv(path, encoding=encoding, chunksize=chunk_rows, **kwargs) as reader:
+            yield from reader
+    elif path.endswith(".xlsx"):
+        yield from _xlsx_chunks(path, chunk_rows, as_text)
+    else:
+        raise ValueError(f"Unsupported file format: {os.path.basename(path)}")
+
+def field_widths(path, block_bytes=8 * 1024 * 1024):
+    """
+    Widest field in bytes at each position of a CSV's data rows, from a raw
+    scan of its separators, without parsing.
+
+    A field's width on disk (quotes and escapes included) is never less than
+    its value's, so this bounds every column's values at disk speed. Commas
+    and newlines count as separators only outside double quotes. The header,
+    taken to be the first line, is not counted.
+    """
+    widths = np.zeros(0, dtype=np.int64)
+    carry = b""         # records running past the previous block
+    header = True
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_bytes)
+            data = carry + block
+            if not data:
+                break
+            arr = np.frombuffer(data, dtype=np.uint8)
+            outside = np.bitwise_xor.accumulate((arr == 0x22).view(np.uint8)) == 0
+            newline = (arr == 0x0A) & outside
+            if block:
+                ends = np.flatnonzero(newline)
+                if not len(ends):
+                    carry = data
+                    continue
+                cut = int(ends[-1]) + 1
+                arr, outside, newline = arr[:cut], outside[:cut], newline[:cut]
+                carry = data[cut:]
+            elif not newline[-1]:
+                # The last record has no newline: end it where the file does
+                arr = np.append(arr, np.uint8(0x0A))
+                newline = np.append(newline, True)
+                outside = np.append(outside, True)
+            seps = np.flatnonzero(newline | ((arr == 0x2C) & outside))
+            lengths = np.diff(seps, prepend=-1) - 1
+            record_end = newline[seps]
+            # Separators before each one in its record give its field's position
+            record_start = np.concatenate(([0], np.flatnonzero(record_end)[:-1] + 1))
+            record = np.concatenate(([0], np.cumsum(record_end)[:-1]))
+            position = np.arange(len(seps)) - record_start[record]
+            if header:
+                rows = record > 0
+                lengths, position = lengths[rows], position[rows]
+                header = False
+            if len(position):
+                if position.max() >= len(widths):
+                    widths = np.pad(widths, (0, int(position.max()) + 1 - len(widths)))
+                np.maximum.at(widths, position, lengths)
+            if not block:
+                break
+    return [int(width) for width in widths]
+
+class ChunkWriter:
+    """Write DataFrame chunks to one CSV (utf-8-sig) or XLSX file as they are produced.
+
+    Chunks go to path + ".part"; leaving the with block renames it to path,
+    or deletes it if the block raised, so a failed load never leaves a
+    truncated output under the final name.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.part_path = self.path + ".part"
+        self.rows = 0
+        self._csv = None
+        self._workbook = None
+        self._sheet = None
+
+    def write(self, df):
+        if self.path.endswith(".csv"):
+            first = self._csv is None
+            if first:
+                self._csv = open(self.part_path, "w", encoding="utf-8-sig", newline="")
+            df.to_csv(self._csv, index=False, header=first)
+        else:
+            if self._workbook is None:
+                from openpyxl import Workbook
+                # Write-only workbooks stream rows to disk instead of keeping every cell
+                self._workbook = Workbook(write_only=True)
+                self._sheet = self._workbook.create_sheet("Sheet1")
+                self._sheet.append([str(col) for col in df.columns])
+            for row in df.itertuples(index=False, name=None):
+                self._sheet.append([None if isinstance(v, float) and math.isnan(v) else v for v in row])
+        self.rows += len(df)
+
+    def close(self):
+        if self._csv is not None:
+            self._csv.close()
+            self._csv = None
+        if self._workbook is not None:
+            self._workbook.save(self.part_path)
+            self._workbook = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        finally:
+            if exc_type is None and os.path.exists(self.part_path):
+                os.replace(self.part_path, self.path)
+            elif os.path.exists(self.part_path):
+                os.remove(self.part_path)
+
+def _version(text):
+    return tuple(int(part) for part in text.split(".")[:2] if part.isdigit())
+
+def arrow_insert_supported():
+    """True if executemany() can take a pandas DataFrame directly (python-oracledb 3.1+, pyarrow)."""
+    if not ARROW_INSERT or not hasattr(pd.DataFrame, "__arrow_c_stream__"):
+        return False
+    try:
+        import pyarrow  # noqa: F401 - pandas needs it to export Arrow streams
+    except ImportError:
+        return False
+    return _version(oracledb.__version__) >= (3, 1)
+
+def frame_rows(df, columns):
+    """Rows for executemany built column by column, with None for missing values."""
+    values = []
+    for col in columns:
+        series = df[col]
+        values.append(series.astype(object).where(series.notna(), None).tolist())
+    return list(zip(*values))
+
+def frame_input_sizes(df, columns):
+    """Bind widths for the text columns (None lets the driver pick for the rest)."""
+    sizes = []
+    for col in columns:
+        series = df[col]
+        # Only all-string columns get a text bind; converted numbers and dates keep theirs
+        if pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+            width = series.dropna().astype(str).str.len().max()
+            sizes.append(int(width) if width and width == width else 1)
+        else:
+            sizes.append(None)
+    return sizes
+
+def _rejects_frame(error):
+    """True when the driver could not take the frame itself (as opposed to a database error)."""
+    if isinstance(error, oracledb.NotSupportedError):
+        return True
+    return not isinstance(error, oracledb.DatabaseError)
+
+def insert_frame(cursor, sql, df, columns, tuner, file_metrics=None):
+    """
+    Insert a DataFrame's columns in tuner-sized slices and return the rows sent.
+
+    Uses data frame ingestion when available and falls back to column-built
+    row binds for the rest of the frame if the driver rejects it (for
+    example a column of mixed Python types).
+    """
+    frame = df[list(columns)]
+    use_arrow = arrow_insert_supported()
+    rows = None
+    sizes = None
+    sent = 0
+    while sent < len(frame):
+        size = tuner.next_size()
+        if use_arrow:
+            batch = frame.iloc[sent:sent + size]
+            started = time.perf_counter()
+            try:
+                cursor.executemany(sql, batch)
+            except Exception as e:
+                if not _rejects_frame(e):
+                    raise
+                logging.warning(f"Data frame insert not possible ({e}); binding rows instead")
+                use_arrow = False
+                continue
+        else:
+            if rows is None:
+                rows = frame_rows(frame, columns)
+                sizes = frame_input_sizes(frame, columns)
+            batch = rows[sent:sent + size]
+            started = time.perf_counter()
+            cursor.setinputsizes(*sizes)
+            cursor.executemany(sql, batch)
+        seconds = time.perf_counter() - started
+        tuner.record(len(batch), seconds, size=size)
+        if file_metrics is not None:
+            file_metrics.add_phase("insert", seconds)
+            file_metrics.add_batch(len(batch), seconds, insert=seconds)
+        sent += len(batch)
+    if file_metrics is not None:
+        file_metrics.batch_size = tuner.size
+    return sent
@@ -1,213 +1,433 @@
 import sys
 import os
 from pathlib import Path
-import pandas as pd
 import glob
 import re
 import shutil
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
 from datetime import datetime
 
 BASE_DIR = os.environ.get("MIS_INSTANCE_PATH", os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 MASTER_LOG = os.path.join(BASE_DIR, "mis-cli.log")
 HISTORY_LOG = os.path.join(BASE_DIR, "history.log")
 
+# Files loaded at once, each on its own pooled connection; 1 loads them one by one
+WORKERS = int(os.environ.get("MIS_CSV_WORKERS", "1"))
+
+_log_lock = threading.Lock()
+# Table DDL must not race between workers
+_ddl_lock = threading.Lock()
+_scope_locks = {}
+_scope_locks_guard = threading.Lock()
+
 def log_action(action):
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     message = f"{timestamp} - {action}\n"
-    with open(MASTER_LOG, "a", encoding="utf-8") as f:
-        f.write(message)
-    with open(HISTORY_LOG, "a", encoding="utf-8") as f:
-        f.write(message)
+    with _log_lock:
+        with open(MASTER_LOG, "a", encoding="utf-8") as f:
+            f.write(message)
+        with open(HISTORY_LOG, "a", encoding="utf-8") as f:
+            f.write(message)
 
 # Add the parent directory to Python path so we can import from libs
 sys.path.append(str(Path(__file__).parent.parent))
-from libs.oracle_db_connector import get_connection
+from libs.oracle_db_connector import get_connection, get_pool, pooled_connection, warm_up
+from libs.load_metrics import LoadMetrics
+from libs.batch_tuner import BatchTuner, estimate_row_bytes
+from libs.schema_cache import table_exists, table_column_types, invalidate
+from libs.load_ledger import file_sha256, find_load, record_load
+from libs.table_stats import PostLoadStats
+from libs.tabular_io import read_chunks, ChunkWriter, insert_frame
+from libs.schema_inference import infer_column_types, convert_frame, column_widths, widen_to, can_need_widening
 
 # Correct data paths: mis-cli/data/sg_loader/input and completed
 data_dir = Path(BASE_DIR) / "csv_loader"
 input_folder = data_dir / "input"
 completed_folder = data_dir / "completed"
+log_folder = data_dir / "log"
 os.makedirs(completed_folder, exist_ok=True)
+os.makedirs(log_folder, exist_ok=True)
+metrics_file = log_folder / f"csv_loader_{datetime.now().strftime('%Y%m%d_%H%M%S')}.metrics.jsonl"
 
 # We'll scan for all CSV/XLSX files in the input folder (filename validation happens per-file)
 
-def table_exists(cur, table_name):
-    cur.execute(
-        "SELECT COUNT(*) FROM user_tables WHERE table_name = :tbl",
-        {"tbl": table_name.upper()}
-    )
-    return cur.fetchone()[0] > 0
+# Campus/term keys stay text so the per-file delete compares them as strings
+KEY_COLUMNS = ("GI01", "GI03", "SB00")
 
-def create_table(cur, table_name, columns):
-    col_defs = ', '.join([f'"{col}" VARCHAR2(4000)' for col in columns])
+def create_table(cur, table_name, columns, sample):
+    # VARCHAR2 sizes come from the first chunk of the first file, NUMBER/DATE from overrides (see libs/schema_inference.py)
+    types = infer_column_types(table_name.upper(), sample, columns, text_columns=KEY_COLUMNS)
+    col_defs = ', '.join([f'"{col}" {types[col]}' for col in columns])
     sql = f'CREATE TABLE "{table_name.upper()}" ({col_defs})'
     cur.execute(sql)
+    invalidate(table_name)
     print(f"🆕 Created table {table_name}")
     log_action(f"Created table {table_name}")
 
-log_action("===== CSV Loader script started =====")
+def file_code(filename):
+    """
+    The file's 2-letter code, or (None, reason) when the name is not valid.
 
-conn = get_connection(section="dwh") # Use your actual section name here
-if conn is None:
-    print("❌ Could not connect to DWH database.") 
-    log_action("Could not connect to DWH database.")
-    sys.exit(1)
-cur = conn.cursor()
+    Names need exactly one alphabetic run of length 2, the rest digits or
+    underscores (e.g. 861_TV_257).
+    """
+    base = os.path.splitext(filename)[0]
+    alpha_runs = re.findall(r"[A-Za-z]+", base)
+    if len(alpha_runs) != 1 or len(alpha_runs[0]) != 2:
+        return None, f"Skipping {filename}: expected exactly one 2-letter alpha token in filename (e.g. 861_TV_257)"
+    rest = re.sub(r"[A-Za-z]+", "", base)
+    if not re.fullmatch(r"[0-9_]+", rest):
+        return None, f"Skipping {filename}: filename contains unexpected characters besides the 2-letter code"
+    return alpha_runs[0].lower(), None
 
-# Gather all .csv and .xlsx files in the input folder
-input_files = []
-input_files.extend(glob.glob(str(input_folder / "*.csv")))
-input_files.extend(glob.glob(str(input_folder / "*.xlsx")))
-    
-if not input_files:
-    print("No CSV input files found.")
-    log_action("No CSV input files found.")
-else:
-    for input_file in input_files:
-        filename = os.path.basename(input_file)
-
-        print(f"Processing {filename} ...")
-        log_action(f"Processing {filename} ...")
-
-        # Strict filename validation: exactly one alphabetic run of length 2, rest digits/underscores
-        base = os.path.splitext(filename)[0]
-        alpha_runs = re.findall(r"[A-Za-z]+", base)
-        if len(alpha_runs) != 1 or len(alpha_runs[0]) != 2:
-            msg = f"Skipping {filename}: expected exactly one 2-letter alpha token in filename (e.g. 861_TV_257)"
-            print("⚠️", msg)
-            log_action(msg)
-            continue
-        code = alpha_runs[0].lower()
-        rest = re.sub(r"[A-Za-z]+", "", base)
-        if not re.fullmatch(r"[0-9_]+", rest):
-            msg = f"Skipping {filename}: filename contains unexpected characters besides the 2-letter code"
-            print("⚠️", msg)
-            log_action(msg)
-            continue
+def normalize_columns(df):
+    """Column names made case-insensitive, without BOM/whitespace."""
+    return (
+        df.columns.astype(str)
+        .str.strip()
+        .str.replace('\ufeff', '', regex=False)
+        .str.upper()
+    )
 
-        # code becomes the GI90 value used in table name; we keep Oracle behavior of uppercasing table identifiers
-        gi90_value = code
-        table_name = f"mis_{gi90_value}_ext"
+def valid_sb00(df):
+    """Mask of the rows whose SB00 is @ followed by 8 digits."""
+    sb = df['SB00'].fillna('').astype(str).str.strip()
+    return sb.str.match(r'^@\d{8}$')
 
-        try:
-            # Use appropriate pandas reader and coerce values to strings for consistency
-            if filename.endswith(".csv"):
-                df = pd.read_csv(input_file, encoding="utf-8-sig", dtype=str)
-            elif filename.endswith(".xlsx"):
-                df = pd.read_excel(input_file, dtype=str)
-            else:
-                log_action(f"Skipped unknown file format: {filename}")
+def scan_file(input_file):
+    """
+    Columns, first chunk and widest valid-SB00 value per column of one file,
+    or None when it is not a loadable file. A file that cannot be read here
+    fails again, and is reported, when it is loaded.
+    """
+    found = None
+    try:
+        with closing(read_chunks(input_file, as_text=True, encoding="utf-8-sig")) as chunks:
+            for df in chunks:
+                df.columns = normalize_columns(df)
+                if not {"GI01", "GI03", "SB00"}.issubset(df.columns):
+                    break
+                if found is None:
+                    found = (df.columns, df, {})
+                columns, _, widths = found
+                rows = df[valid_sb00(df)]
+                column_widths(rows, [col for col in rows.columns if col in columns], widths)
+    except Exception as e:
+        log_action(f"Could not scan {os.path.basename(input_file)} before loading: {e}")
+        return None
+    return found
+
+def needs_scan(cur, table_name, input_file):
+    """True unless the table exists and no value of the file can be wider than its columns."""
+    if not table_exists(cur, table_name):
+        return True
+    if not input_file.endswith(".csv"):
+        # Only a CSV's widths can be bounded without reading its values
+        return True
+    try:
+        with closing(read_chunks(input_file, chunk_rows=1, as_text=True, encoding="utf-8-sig")) as chunks:
+            columns = normalize_columns(next(chunks))
+        return can_need_widening(table_column_types(cur, table_name), input_file, columns)
+    except Exception:
+        # The scan logs why the file cannot be read
+        return True
+
+def prepare_tables(conn, input_files, workers=1):
+    """
+    Create and widen every target table once, before any file's DML.
+
+    Widening is DDL: mid-file it would commit the file's delete and inserts,
+    and with parallel workers it waits on their open transactions
+    (ORA-00054), so it cannot be left to each worker. Instead each table
+    gets at most one CREATE/ALTER here. Only files that can need it are
+    scanned for their widest values (see needs_scan), on `workers` threads.
+    """
+    started = time.perf_counter()
+    cur = conn.cursor()
+    try:
+        to_scan = []
+        for input_file in input_files:
+            code, _ = file_code(os.path.basename(input_file))
+            if code is None:
                 continue
+            table_name = f"mis_{code}_ext"
+            if needs_scan(cur, table_name, input_file):
+                to_scan.append((table_name, input_file))
+        if not to_scan:
+            return
+        tables = {}  # table name -> (columns, first chunk, widths)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(to_scan)))) as executor:
+            scans = executor.map(scan_file, [input_file for _, input_file in to_scan])
+            for (table_name, _), found in zip(to_scan, scans):
+                if found is None:
+                    continue
+                columns, sample, widths = found
+                merged = tables.setdefault(table_name, (columns, sample, {}))[2]
+                for col, width in widths.items():
+                    merged[col] = max(merged.get(col, 0), width)
+        for table_name, (columns, sample, widths) in tables.items():
+            if not table_exists(cur, table_name):
+                create_table(cur, table_name, columns, sample)
+            if widen_to(cur, table_name.upper(), widths, quote=True):
+                log_action(f"Widened columns of {table_name} for this run's files")
+    finally:
+        cur.close()
+    log_action(f"Prepared {len(tables)} table(s) from {len(to_scan)} of {len(input_files)} file(s) "
+               f"in {time.perf_counter() - started:.1f}s")
+
+def lock_scope(table_name, ccc, ttt):
+    """Acquire and return the lock of one table's campus/term."""
+    with _scope_locks_guard:
+        lock = _scope_locks.setdefault((table_name, ccc, ttt), threading.Lock())
+    lock.acquire()
+    return lock
+
+def process_file(conn, input_file):
+    """Validate, load and annotate one input file on conn, committing or rolling back just this file."""
+    filename = os.path.basename(input_file)
+
+    print(f"Processing {filename} ...")
+    log_action(f"Processing {filename} ...")
+
+    # Strict filename validation: exactly one alphabetic run of length 2, rest digits/underscores
+    code, msg = file_code(filename)
+    if code is None:
+        print("⚠️", msg)
+        log_action(msg)
+        return
+
+    # code becomes the GI90 value used in table name; we keep Oracle behavior of uppercasing table identifiers
+    gi90_value = code
+    table_name = f"mis_{gi90_value}_ext"
+
+    file_metrics = metrics.start_file(filename, table_name.upper(), os.path.getsize(input_file))
+    file_metrics.start_round_trips(conn)
+    file_started = time.perf_counter()
+    cur = conn.cursor()
+    scope_lock = None
+    try:
+        # Skip files whose exact content is already the current load of their campus/term
+        with file_metrics.phase("hash file"):
+            content_hash = file_sha256(input_file)
+        loaded_before = find_load(conn, table_name, content_hash)
+        if loaded_before:
+            msg = f"{filename} is already loaded into {table_name.upper()} for {loaded_before['scope']} ({loaded_before['loaded_at']}); skipping"
+            print("⏭️", msg)
+            log_action(msg)
+            shutil.move(input_file, os.path.join(completed_folder, filename))
+            log_action(f"Moved {filename} to completed folder")
+            file_metrics.finish(0)
+            return
+
+        # Stream the file in chunks (values read as strings) so memory stays flat for large extracts
+        with closing(read_chunks(input_file, as_text=True, encoding="utf-8-sig")) as chunks:
+            with file_metrics.phase("read"):
+                df = next(chunks, None)
+            if df is None:
+                raise ValueError(f"No data rows in {filename}")
 
             # Normalize column names to be case-insensitive and strip BOM/whitespace
-            df.columns = (
-                df.columns.astype(str)
-                .str.strip()
-                .str.replace('\ufeff', '', regex=False)
-                .str.upper()
-            )
+            columns = normalize_columns(df)
+            df.columns = columns
 
             # Validate required columns exist after normalization (GI01 and GI03 are required)
             required = {"GI01", "GI03"}
-            found = set(df.columns.tolist())
+            found = set(columns.tolist())
             if not required.issubset(found):
-                msg = f"Required columns missing in {filename}. Found columns: {df.columns.tolist()}"
+                msg = f"Required columns missing in {filename}. Found columns: {columns.tolist()}"
                 print("❌", msg)
                 log_action(msg)
-                continue
-
-            # Ensure all data values are strings (consistent with table creation of VARCHAR2)
-            df = df.astype(str)
+                file_metrics.fail(msg)
+                file_metrics.finish()
+                return
 
-            if not table_exists(cur, table_name):
-                create_table(cur, table_name, df.columns)
+            # prepare_tables has created and widened the table for every queued file;
+            # this only covers a file it could not scan, before any of this file's DML
+            with file_metrics.phase("prepare"), _ddl_lock:
+                if not table_exists(cur, table_name):
+                    create_table(cur, table_name, columns, df)
 
             # Assumes all rows in the file have the same CCC and TTT
             ccc = str(df['GI01'].iloc[0])
             ttt = str(df['GI03'].iloc[0])
+            # Files for the same campus/term replace each other one at a time, from delete to commit
+            scope_lock = lock_scope(table_name, ccc, ttt)
 
             # Delete existing records for this campus/term
             delete_sql = f'''
                 DELETE FROM "{table_name.upper()}"
                 WHERE "GI01" = :ccc AND "GI03" = :ttt
             '''
-            cur.execute(delete_sql, {"ccc": ccc, "ttt": ttt})
+            with file_metrics.phase("delete"):
+                cur.execute(delete_sql, {"ccc": ccc, "ttt": ttt})
             print(f"🗑️ Deleted existing records for campus {ccc}, term {ttt}")
             log_action(f"Deleted existing records for campus {ccc}, term {ttt}")
+
             # Validate SB00 values: strict format ^@\d{8}$
             # df columns have been normalized to uppercase earlier
-            orig_columns = df.columns.tolist()
-            if 'SB00' not in df.columns:
+            orig_columns = columns.tolist()
+            has_sb00 = 'SB00' in orig_columns
+            if not has_sb00:
                 msg = f"SB00 column missing in {filename}; marking all rows as not loaded and skipping DB insert"
                 print("⚠️", msg)
                 log_action(msg)
-                # mark all as not loaded and save annotated file
-                df['LOADED'] = 'N'
-                ext = ".csv" if filename.endswith(".csv") else ".xlsx"
-                new_filename = f"{ccc}_{ttt}_{gi90_value}{ext}"
-                dest_file = os.path.join(completed_folder, new_filename)
-                if ext == '.csv':
-                    df.to_csv(dest_file, index=False, encoding='utf-8-sig')
-                else:
-                    df.to_excel(dest_file, index=False)
-                log_action(f"Saved annotated (no SB00) file: {new_filename}")
-                # Remove the original input file after saving annotated copy
-                try:
-                    os.remove(input_file)
-                    log_action(f"Removed original input file: {filename}")
-                except Exception as e:
-                    log_action(f"Failed to remove original input file {filename}: {e}")
             else:
-                sb = df['SB00'].fillna('').astype(str).str.strip()
-                valid_mask = sb.str.match(r'^\d*$')  # placeholder, will replace next line
-                # strict pattern: @ followed by 8 digits
-                valid_mask = sb.str.match(r'^@\d{8}$')
-
-                df_to_insert = df[valid_mask].copy()
-                num_valid = len(df_to_insert)
-                num_invalid = len(df) - num_valid
-
-                # Insert only valid rows (if any)
-                if num_valid > 0:
-                    cols = ','.join([f'"{col}"' for col in orig_columns])
-                    placeholders = ','.join([f":{i+1}" for i in range(len(orig_columns))])
-                    insert_sql = f'INSERT INTO "{table_name.upper()}" ({cols}) VALUES ({placeholders})'
-                    cur.executemany(insert_sql, df_to_insert[orig_columns].values.tolist())
-                    print(f"✅ Loaded {num_valid} rows into {table_name}")
-                    log_action(f"Loaded {num_valid} rows into {table_name}")
-                else:
-                    print(f"⚠️ No valid SB00 rows to insert for {filename}")
-                    log_action(f"No valid SB00 rows to insert for {filename}")
-
-                # Annotate original dataframe with LOADED column and save to completed folder
-                df['LOADED'] = valid_mask.map({True: 'Y', False: 'N'})
-                ext = ".csv" if filename.endswith(".csv") else ".xlsx"
-                new_filename = f"{ccc}_{ttt}_{gi90_value}{ext}"
-                dest_file = os.path.join(completed_folder, new_filename)
-                if ext == '.csv':
-                    df.to_csv(dest_file, index=False, encoding='utf-8-sig')
-                else:
-                    df.to_excel(dest_file, index=False)
-                log_action(f"Saved annotated file {new_filename}: {num_valid} loaded, {num_invalid} skipped")
-                print(f"Saved annotated file {new_filename}: {num_valid} loaded, {num_invalid} skipped")
-                # Remove the original input file after saving annotated copy
-                try:
-                    os.remove(input_file)
-                    log_action(f"Removed original input file: {filename}")
-                except Exception as e:
-                    log_action(f"Failed to remove original input file {filename}: {e}")
+                cols = ','.join([f'"{col}"' for col in orig_columns])
+                placeholders = ','.join([f":{i+1}" for i in range(len(orig_columns))])
+                insert_sql = f'INSERT INTO "{table_name.upper()}" ({cols}) VALUES ({placeholders})'
+                tuner = BatchTuner(table_name, initial=1000,
+                                   row_bytes=estimate_row_bytes([32] * len(orig_columns)),
+                                   log=log_action)
+
+            # Validate, insert and annotate chunk by chunk; the annotated copy is written as we go
+            # (to a .part file until the load commits)
+            ext = ".csv" if filename.endswith(".csv") else ".xlsx"
+            new_filename = f"{ccc}_{ttt}_{gi90_value}{ext}"
+            dest_file = os.path.join(completed_folder, new_filename)
+            num_valid = 0
+            num_invalid = 0
+            with ChunkWriter(dest_file) as writer:
+                while df is not None:
+                    df.columns = columns
+                    # Ensure all data values are strings (consistent with table creation of VARCHAR2)
+                    df = df.astype(str)
+                    if has_sb00:
+                        # strict pattern: @ followed by 8 digits
+                        valid_mask = valid_sb00(df)
+                        # Insert only valid rows (if any)
+                        valid_rows = df[valid_mask]
+                        if len(valid_rows):
+                            with file_metrics.phase("convert"):
+                                typed = convert_frame(valid_rows, table_column_types(cur, table_name), orig_columns)
+                            insert_frame(cur, insert_sql, typed, orig_columns, tuner, file_metrics)
+                        chunk_valid = int(valid_mask.sum())
+                        df['LOADED'] = valid_mask.map({True: 'Y', False: 'N'})
+                    else:
+                        chunk_valid = 0
+                        df['LOADED'] = 'N'
+                    num_valid += chunk_valid
+                    num_invalid += len(df) - chunk_valid
+                    with file_metrics.phase("write output"):
+                        writer.write(df)
+                    with file_metrics.phase("read"):
+                        df = next(chunks, None)
+
+                # The ledger entry commits together with this file's delete and inserts;
+                # the annotated copy only takes its final name once that commit succeeds
+                with file_metrics.phase("commit"):
+                    record_load(conn, table_name, f"{ccc}/{ttt}", content_hash, filename, "csv_loader",
+                                num_valid, time.perf_counter() - file_started)
+                    stats.touch(table_name)
+
+        if not has_sb00:
+            log_action(f"Saved annotated (no SB00) file: {new_filename}")
+        else:
+            if num_valid > 0:
+                print(f"✅ Loaded {num_valid} rows into {table_name}")
+                log_action(f"Loaded {num_valid} rows into {table_name}")
+            else:
+                print(f"⚠️ No valid SB00 rows to insert for {filename}")
+                log_action(f"No valid SB00 rows to insert for {filename}")
+            log_action(f"Saved annotated file {new_filename}: {num_valid} loaded, {num_invalid} skipped")
+            print(f"Saved annotated file {new_filename}: {num_valid} loaded, {num_invalid} skipped")
 
+        # Remove the original input file after saving annotated copy
+        try:
+            os.remove(input_file)
+            log_action(f"Removed original input file: {filename}")
         except Exception as e:
-            err_msg = f"Error processing {filename}: {e}"
-            print("❌", err_msg)
-            log_action(err_msg)
-            # continue to next file without aborting entire run
-            continue
+            log_action(f"Failed to remove original input file {filename}: {e}")
+        file_metrics.stop_round_trips(conn)
+        file_metrics.finish(num_valid)
+
+    except Exception as e:
+        err_msg = f"Error processing {filename}: {e}"
+        print("❌", err_msg)
+        log_action(err_msg)
+        # Undo this file's delete/inserts so they are not committed with anything else
+        conn.rollback()
+        file_metrics.fail(e)
+        file_metrics.finish()
+    finally:
+        if scope_lock is not None:
+            scope_lock.release()
+        cur.close()
+
+def run_parallel(input_files, workers):
+    """Load several input files at once, each on its own pooled connection."""
+    workers = max(1, min(workers, len(input_files)))
+    if get_pool("dwh", pool_min=1, pool_max=workers, pool_inc=1) is None:
+        raise ConnectionError("Could not create DWH connection pool")
+    # Open the workers' sessions up front instead of one by one as they start
+    warm_up("dwh", workers)
+    with pooled_connection("dwh") as conn:
+        prepare_tables(conn, input_files, workers)
+    print(f"Parallel mode: {len(input_files)} file(s) across {workers} worker(s)")
+    log_action(f"Parallel mode: {len(input_files)} file(s) across {workers} worker(s)")
+
+    def load(input_file):
+        with pooled_connection("dwh") as conn:
+            process_file(conn, input_file)
+
+    # Largest files first so the longest load starts right away
+    input_files = sorted(input_files, key=os.path.getsize, reverse=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(load, input_file): input_file for input_file in input_files}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                # process_file handles its own errors; this is a failure to get a connection
+                msg = f"Error processing {os.path.basename(futures[future])}: {e}"
+                print("❌", msg)
+                log_action(msg)
+
+log_action("===== CSV Loader script started =====")
+
+metrics = LoadMetrics("csv_loader", metrics_file)
+stats = PostLoadStats("csv_loader")
+
+# Gather all .csv and .xlsx files in the input folder
+input_files = []
+input_files.extend(glob.glob(str(input_folder / "*.csv")))
+input_files.extend(glob.glob(str(input_folder / "*.xlsx")))
+
+if not input_files:
+    print("No CSV input files found.")
+    log_action("No CSV input files found.")
+elif WORKERS > 1 and len(input_files) > 1:
+    try:
+        run_parallel(input_files, WORKERS)
+    except ConnectionError as e:
+        print("❌", e)
+        log_action(str(e))
+        sys.exit(1)
+else:
+    conn = get_connection(section="dwh", use_pool=True) # Use your actual section name here
+    if conn is None:
+        print("❌ Could not connect to DWH database.") 
+        log_action("Could not connect to DWH database.")
+        sys.exit(1)
+    try:
+        prepare_tables(conn, input_files)
+        for input_file in input_files:
+            process_file(conn, input_file)
+    finally:
+        conn.close()
 
-    conn.commit()
+if input_files:
+    stats.gather()
+    # Every file commits on its own, so there is no run-level commit to time
+    for line in metrics.finish(workers=WORKERS):
+        print(line)
+    log_action(f"Metrics written to {metrics_file}")
+    for line in stats.wait():
+        print(line)
+        log_action(line)
 
-cur.close()
-conn.close()
 print("🎉 All done!")
 log_action("All done!")
 log_action("===== CSV Loader script finished =====")
@@ -4,11 +4,25 @@ from datetime import datetime
 from pathlib import Path
 import shutil
 import os
+import json
+import hashlib
+import sqlite3
+import time
+import threading
+import queue
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add the parent directory to Python path so we can import from libs
 sys.path.append(str(Path(__file__).parent.parent))
-from libs.layout_definitions import LAYOUTS                   # ✅ Works with sys.path
-from libs.oracle_db_connector import get_connection          # ✅ Works with sys.path
+from libs.layout_definitions import get_compiled_layout       # ✅ Works with sys.path
+from libs.oracle_db_connector import get_connection, get_pool, pooled_connection, warm_up  # ✅ Works with sys.path
+from libs.load_metrics import LoadMetrics
+from libs.batch_tuner import BatchTuner, estimate_row_bytes, BYTES_PER_VALUE, MEMORY_BUDGET_MB
+from libs.schema_cache import table_exists, table_column_types, table_partitions, is_partitioned, add_columns, invalidate
+from libs.load_ledger import file_sha256, find_load, record_load
+from libs.table_stats import PostLoadStats
+from libs.reject_file import RejectFile
 
 # --- Setup paths relative to CLI structure ---
 BASE_DIR = os.environ.get("MIS_INSTANCE_PATH", os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -25,17 +39,53 @@ COMPLETED_DIR.mkdir(parents=True, exist_ok=True)
 
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 LOG_FILE = LOG_DIR / f"dat_loader_{timestamp}.log"
-CHECKPOINT_FILE = LOG_DIR / "loader_checkpoint.txt"
+METRICS_FILE = LOG_DIR / f"dat_loader_{timestamp}.metrics.jsonl"
+CHECKPOINT_FILE = LOG_DIR / "loader_checkpoint.json"
 LOAD_MOST_RECENT_FIRST = False
+# Rows per executemany/commit; with MIS_BATCH_AUTOTUNE on this is the starting size
+BATCH_SIZE = int(os.environ.get("MIS_DAT_BATCH_SIZE", "5000"))
+# Number of MIS_xx tables loaded at the same time. 1 keeps the original sequential behaviour.
+PARALLEL_WORKERS = int(os.environ.get("MIS_DAT_WORKERS", "1"))
+# How an existing term is replaced before reloading:
+#   "delete"   - DELETE ... WHERE GI03_TERM_ID = :1 (original behaviour, heap tables)
+#   "truncate" - list-partition MIS_xx by GI03_TERM_ID and truncate the term's partition
+#   "exchange" - direct-path load a staging table, then exchange it with the term's partition
+# Partition strategies fall back to "delete" for tables created before they were enabled.
+LOAD_STRATEGY = os.environ.get("MIS_DAT_LOAD_STRATEGY", "delete").lower()
+# Delta mode compares a hash of every record against the ROW_HASH column of the
+# rows already loaded for the term and only applies the deletes/inserts that changed.
+DELTA_MODE = os.environ.get("MIS_DAT_DELTA", "0") == "1"
+# Index handling for large loads:
+#   "maintain" - keep indexes up to date row by row (original behaviour)
+#   "unusable" - mark the table's indexes UNUSABLE during the insert and rebuild them afterwards
+#   "drop"     - drop the key indexes before the insert and recreate them afterwards
+# Only files of at least INDEX_DEFER_MIN_MB are deferred; smaller loads maintain indexes.
+INDEX_MODE = os.environ.get("MIS_DAT_INDEX_MODE", "maintain").lower()
+INDEX_DEFER_MIN_MB = float(os.environ.get("MIS_DAT_INDEX_DEFER_MIN_MB", "50"))
+INDEX_REBUILD_PARALLEL = int(os.environ.get("MIS_DAT_INDEX_PARALLEL", "1"))
+INDEX_REBUILD_NOLOGGING = os.environ.get("MIS_DAT_INDEX_NOLOGGING", "0") == "1"
+# Where rows are written: "oracle" (the DWH) or "sqlite" for an offline copy of the
+# term in SQLITE_PATH. SQLite loads leave files in pending and do not touch checkpoints,
+# so the same files can still be loaded into the DWH afterwards.
+LOAD_TARGET = os.environ.get("MIS_DAT_TARGET", "oracle").lower()
+SQLITE_PATH = Path(os.environ.get("MIS_DAT_SQLITE_PATH", Path(BASE_DIR) / "dat_loader" / "mis_dat.sqlite3"))
+# Skip rows Oracle rejects (written to a reject file next to the log) instead of failing the file
+BATCH_ERRORS = os.environ.get("MIS_DAT_BATCH_ERRORS", "1") == "1"
+# Number of parsed batches the reader thread may queue ahead of the insert stage.
+# Bounds memory to about (depth + 2) batches; 0 reads, parses and inserts on one thread.
+PIPELINE_DEPTH = int(os.environ.get("MIS_DAT_PIPELINE_DEPTH", "2"))
+
+_log_lock = threading.Lock()
 
 def log_action(action):
     from datetime import datetime
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     message = f"{timestamp} - {action}\n"
-    with open(MASTER_LOG, "a", encoding="utf-8") as f:
-        f.write(message)
-    with open(HISTORY_LOG, "a", encoding="utf-8") as f:
-        f.write(message)
+    with _log_lock:
+        with open(MASTER_LOG, "a", encoding="utf-8") as f:
+            f.write(message)
+        with open(HISTORY_LOG, "a", encoding="utf-8") as f:
+            f.write(message)
 
 # Remove any existing handlers first
 for handler in logging.root.handlers[:]:
@@ -57,33 +107,64 @@ logging.getLogger().addHandler(console)
 logging.info("Logging initialized. Log file: %s", LOG_FILE)
 log_action(f"Logging initialized. Log file: {LOG_FILE}")
 
-CHECKPOINT_FILE = LOG_DIR / "loader_checkpoint.txt"
+METRICS = LoadMetrics("dat_loader", METRICS_FILE)
+STATS = PostLoadStats("dat_loader")
 
 # --- Helper functions ---
 
-def parse_line(line, layout):
-    parsed = {}
-    line_len = len(line)
-    for name, start, end in layout:
-        if start < line_len:
-            parsed[name] = line[start:min(end, line_len)].strip()
+def read_checkpoints():
+    """Return {file name: {"sha256", "rows", "status", "rejected"}} from the checkpoint file."""
+    if not CHECKPOINT_FILE.exists():
+        return {}
+    try:
+        with open(CHECKPOINT_FILE, encoding="utf-8") as cp:
+            return json.load(cp)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable checkpoint file {CHECKPOINT_FILE}: {e}")
+        return {}
+
+def write_checkpoint(filename, content_hash, rows, status="partial", rejected=0):
+    """Record the lines processed so far for a file (thread safe, atomic replace).
+
+    rejected counts the lines among them that Oracle refused, which are not
+    in the table.
+    """
+    with _log_lock:
+        checkpoints = read_checkpoints()
+        checkpoints[filename.name] = {"sha256": content_hash, "rows": rows, "status": status, "rejected": rejected}
+        tmp = CHECKPOINT_FILE.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as cp:
+            json.dump(checkpoints, cp, indent=2)
+        os.replace(tmp, CHECKPOINT_FILE)
+
+def clear_checkpoint(filename):
+    with _log_lock:
+        checkpoints = read_checkpoints()
+        if checkpoints.pop(filename.name, None) is None:
+            return
+        if checkpoints:
+            with open(CHECKPOINT_FILE, "w", encoding="utf-8") as cp:
+                json.dump(checkpoints, cp, indent=2)
         else:
-            parsed[name] = ""
-    return parsed
-
-def create_indexes(cursor, table_name, layout):
-    """Create indexes on key columns if they exist in the layout."""
-    index_fields = [
-        "GI01_DISTRICT_COLLEGE_ID",
-        "GI03_TERM_ID",
-        "SB00_STUDENT_ID",
-        "EB00_EMPLOYEE_ID"
-    ]
-    for col in index_fields:
+            CHECKPOINT_FILE.unlink()
+
+INDEX_FIELDS = [
+    "GI01_DISTRICT_COLLEGE_ID",
+    "GI03_TERM_ID",
+    "SB00_STUDENT_ID",
+    "EB00_EMPLOYEE_ID"
+]
+
+def create_indexes(cursor, table_name, layout, options=""):
+    """Create indexes on key columns if they exist in the layout.
+
+    options is appended to each CREATE INDEX (e.g. "PARALLEL 4 NOLOGGING").
+    """
+    for col in INDEX_FIELDS:
         if any(col == name for name, _, _ in layout):
             idx_name = f"IDX_{table_name}_{col}"
             try:
-                cursor.execute(f'CREATE INDEX {idx_name} ON {table_name} ({col})')
+                cursor.execute(f'CREATE INDEX {idx_name} ON {table_name} ({col}) {options}'.rstrip())
                 logging.info(f"Created index {idx_name} on {table_name}({col})")
                 log_action(f"Created index {idx_name} on {table_name}({col})")
             except Exception as e:
@@ -91,22 +172,246 @@ def create_indexes(cursor, table_name, layout):
                     logging.error(f"Index creation failed for {idx_name}: {e}")
                     log_action(f"Index creation failed for {idx_name}: {e}")
 
-def ensure_table_exists(cursor, table_name, layout):
-    """Create table if it does not exist."""
+def build_options():
+    """PARALLEL/NOLOGGING clause for index builds, from the loader settings."""
+    options = []
+    if INDEX_REBUILD_PARALLEL > 1:
+        options.append(f"PARALLEL {INDEX_REBUILD_PARALLEL}")
+    if INDEX_REBUILD_NOLOGGING:
+        options.append("NOLOGGING")
+    return " ".join(options)
+
+def reset_index_attributes(cursor, idx_name):
+    """Put an index back to serial, logged operation after a parallel/NOLOGGING build."""
+    if INDEX_REBUILD_PARALLEL > 1:
+        cursor.execute(f"ALTER INDEX {idx_name} NOPARALLEL")
+    if INDEX_REBUILD_NOLOGGING:
+        cursor.execute(f"ALTER INDEX {idx_name} LOGGING")
+
+def table_indexes(cursor, table_name):
+    """Non-unique indexes on the table with their status."""
     cursor.execute("""
-        SELECT COUNT(*) FROM all_tables 
-        WHERE table_name = :1 AND owner = USER
+        SELECT index_name, status FROM user_indexes
+        WHERE table_name = :1 AND uniqueness = 'NONUNIQUE'
     """, [table_name.upper()])
-    exists = cursor.fetchone()[0] > 0
-    if not exists:
+    return cursor.fetchall()
+
+def defer_indexes(cursor, table_name, layout, mode=INDEX_MODE):
+    """Take index maintenance out of the insert phase. Returns the mode applied."""
+    if mode == "unusable":
+        for idx_name, status in table_indexes(cursor, table_name):
+            if status != "UNUSABLE":
+                cursor.execute(f"ALTER INDEX {idx_name} UNUSABLE")
+        logging.info(f"Marked indexes on {table_name} unusable for the load")
+        log_action(f"Marked indexes on {table_name} unusable for the load")
+    elif mode == "drop":
+        existing = {name for name, _ in table_indexes(cursor, table_name)}
+        for col in INDEX_FIELDS:
+            idx_name = f"IDX_{table_name}_{col}"
+            if idx_name in existing:
+                cursor.execute(f"DROP INDEX {idx_name}")
+        logging.info(f"Dropped key indexes on {table_name} for the load")
+        log_action(f"Dropped key indexes on {table_name} for the load")
+    return mode
+
+def rebuild_indexes(cursor, table_name, layout, mode):
+    """Bring indexes back after a deferred load.
+
+    Any index left UNUSABLE (including by an interrupted earlier run) is
+    rebuilt, whatever the mode.
+    """
+    options = build_options()
+    if mode == "drop":
+        create_indexes(cursor, table_name, layout, options)
+        for col in INDEX_FIELDS:
+            if any(col == name for name, _, _ in layout):
+                reset_index_attributes(cursor, f"IDX_{table_name}_{col}")
+    for idx_name, status in table_indexes(cursor, table_name):
+        if status == "UNUSABLE":
+            cursor.execute(f"ALTER INDEX {idx_name} REBUILD {options}".rstrip())
+            reset_index_attributes(cursor, idx_name)
+            logging.info(f"Rebuilt index {idx_name}")
+            log_action(f"Rebuilt index {idx_name}")
+
+def log_phase_timings(filename, phases):
+    timings = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in phases.items())
+    logging.info(f"Phase timings for {filename.name}: {timings}")
+    log_action(f"Phase timings for {filename.name}: {timings}")
+
+# A parsed batch: bind-ready row tuples, the file line after the last row,
+# bytes read for the batch, the seconds spent reading/parsing it and the
+# batch size it was cut to (None when not sized by a tuner).
+Batch = namedtuple("Batch", "rows next_line bytes_read parse_seconds size", defaults=(None,))
+
+def read_batches(filename, parser, resume_line=0, batch_size=BATCH_SIZE):
+    """Read and parse a DAT file into Batch tuples, starting at resume_line.
+
+    batch_size is a row count or a BatchTuner, asked for the size of every batch.
+    """
+    next_size = batch_size.next_size if isinstance(batch_size, BatchTuner) else lambda: batch_size
+    size = next_size()
+    expected_len = parser.record_length
+    short_line_warned = False  # Track if we've warned for this file
+    parse = parser.parse
+    rows = []
+    last_offset = 0
+    with open(filename, "rb") as f:
+        batch_started = time.perf_counter()
+        for i, line in enumerate(f):
+            if i < resume_line:
+                continue
+            if not short_line_warned and len(line.rstrip(b"\r\n")) < expected_len:
+                line_len = len(line.rstrip(b"\r\n"))
+                logging.warning(
+                    f"{filename} appears to use an older format: line length {line_len} (expected {expected_len}). "
+                    "All missing fields will be set to blank for this file."
+                )
+                log_action(
+                    f"{filename} appears to use an older format: line length {line_len} (expected {expected_len}). "
+                    "All missing fields will be set to blank for this file."
+                )
+                short_line_warned = True
+            rows.append(parse(line))
+            if len(rows) >= size:
+                offset = f.tell()
+                yield Batch(rows, i + 1, offset - last_offset, time.perf_counter() - batch_started, size)
+                last_offset = offset
+                rows = []
+                size = next_size()
+                batch_started = time.perf_counter()
+        if rows:
+            offset = f.tell()
+            yield Batch(rows, i + 1, offset - last_offset, time.perf_counter() - batch_started, size)
+
+_DONE = object()
+
+def pipelined(batches, depth=PIPELINE_DEPTH):
+    """Run a batch generator on a reader thread, handing batches over a bounded queue.
+
+    The queue gives backpressure: the reader stops once depth batches are
+    waiting, so parsing overlaps with the insert stage's network time
+    without reading the whole file into memory. Reader errors are re-raised
+    in the consumer; if the consumer stops early the reader is told to stop.
+    """
+    if depth <= 0:
+        yield from batches
+        return
+    handoff = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                handoff.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for batch in batches:
+                if not put(batch):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+        finally:
+            batches.close()
+
+    reader = threading.Thread(target=produce, name="dat-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = handoff.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        reader.join()
+
+def log_info(message):
+    logging.info(message)
+    log_action(message)
+
+def batch_tuner_for(table_name, parser, batch_size=BATCH_SIZE):
+    """BatchTuner for one file; the memory budget is shared by every batch the pipeline holds."""
+    return BatchTuner(
+        table_name,
+        initial=batch_size,
+        row_bytes=estimate_row_bytes(parser.widths),
+        memory_budget_mb=MEMORY_BUDGET_MB / (max(PIPELINE_DEPTH, 0) + 2),
+        log=log_info,
+    )
+
+def reject_file_for(filename, columns):
+    """RejectFile for a DAT file's refused rows next to the run's log, or None with batch errors off."""
+    if not BATCH_ERRORS:
+        return None
+    return RejectFile(LOG_DIR / f"{filename.stem}_{timestamp}.rejects.csv", columns)
+
+def timed_flush(cursor, conn, insert_table, parser, batch, direct_path, file_metrics, with_hash=False, commit=True,
+                tuner=None, rejects=None, line_numbers=None):
+    """Insert (and commit) one batch, recording parse/insert/commit time for it.
+
+    With rejects, rows Oracle refuses are written to that RejectFile and the
+    rest are committed; line_numbers gives each row's source line (by default
+    the batch's lines are consecutive, ending at batch.next_line). Returns the
+    number of rows rejected.
+    """
+    started = time.perf_counter()
+    errors = insert_rows(cursor, insert_table, parser, batch.rows, direct_path, with_hash=with_hash,
+                         batch_errors=rejects is not None)
+    inserted = time.perf_counter()
+    rejected = 0
+    if errors:
+        if line_numbers is None:
+            first = batch.next_line - len(batch.rows) + 1
+            line_numbers = range(first, batch.next_line + 1)
+        rejected = rejects.add_batch(errors, batch.rows, line_numbers)
+        file_metrics.rejected += rejected
+    if commit:
+        conn.commit()
+    committed = time.perf_counter()
+    if tuner is not None:
+        # Batches were cut ahead by the reader thread; the tuner ignores any built
+        # at an older size. Bytes are the raw text plus the per-value overhead.
+        tuner.record(len(batch.rows), committed - started, size=batch.size,
+                     bytes_used=batch.bytes_read + BYTES_PER_VALUE * len(parser.widths) * len(batch.rows))
+    file_metrics.add_phase("parse", batch.parse_seconds)
+    file_metrics.add_phase("insert", inserted - started)
+    if commit:
+        file_metrics.add_phase("commit", committed - inserted)
+    file_metrics.add_batch(
+        len(batch.rows) - rejected, batch.parse_seconds + committed - started, batch.bytes_read,
+        parse=batch.parse_seconds, insert=inserted - started, commit=committed - inserted
+    )
+    return rejected
+
+def ensure_table_exists(cursor, table_name, layout, term_id=None, partitioned=False):
+    """Create table if it does not exist.
+
+    When partitioned is set the table is list-partitioned by GI03_TERM_ID,
+    starting with a partition for term_id.
+    """
+    if not table_exists(cursor, table_name):
         columns = ', '.join([
             f'{name} VARCHAR2({end-start})'
             for name, start, end in layout
         ])
         create_sql = f'CREATE TABLE {table_name} ({columns})'
+        if partitioned:
+            create_sql += (
+                f" PARTITION BY LIST (GI03_TERM_ID)"
+                f" (PARTITION {partition_name(term_id)} VALUES ('{term_id}'))"
+            )
         cursor.execute(create_sql)
-        logging.info(f"Created table {table_name}")
-        log_action(f"Created table {table_name}")
+        invalidate(table_name)
+        logging.info(f"Created table {table_name}{' (partitioned by GI03_TERM_ID)' if partitioned else ''}")
+        log_action(f"Created table {table_name}{' (partitioned by GI03_TERM_ID)' if partitioned else ''}")
         create_indexes(cursor, table_name, layout)
 
 def delete_existing_term(cursor, table_name, term_id):
@@ -123,68 +428,592 @@ def delete_existing_term(cursor, table_name, term_id):
         logging.warning(f"Could not delete records for term {term_id} in {table_name}: {e}")
         log_action(f"Could not delete records for term {term_id} in {table_name}: {e}")
 
-def insert_rows(cursor, table_name, layout, rows):
-    """Insert parsed rows into the table."""
-    columns = [name for name, _, _ in layout]
+def partition_name(term_id):
+    """Partition name for a term; term ids are the 3-character MIS term codes."""
+    if not term_id.isalnum():
+        raise ValueError(f"Unexpected term id {term_id!r} for partition name")
+    return f"P_{term_id.upper()}"
+
+def ensure_term_partition(cursor, table_name, term_id):
+    """Add the term's list partition if the table does not have it yet."""
+    part = partition_name(term_id)
+    if part not in table_partitions(cursor, table_name):
+        cursor.execute(f"ALTER TABLE {table_name} ADD PARTITION {part} VALUES ('{term_id}')")
+        invalidate(table_name)
+        logging.info(f"Added partition {part} to {table_name}")
+        log_action(f"Added partition {part} to {table_name}")
+    return part
+
+def truncate_term_partition(cursor, table_name, term_id):
+    """Empty the term's partition; cost does not grow with the number of stored terms."""
+    part = ensure_term_partition(cursor, table_name, term_id)
+    cursor.execute(f"ALTER TABLE {table_name} TRUNCATE PARTITION {part} UPDATE GLOBAL INDEXES")
+    logging.info(f"Truncated partition {part} of {table_name}")
+    log_action(f"Truncated partition {part} of {table_name}")
+
+def prepare_staging_table(cursor, table_name):
+    """Create (or empty) the non-partitioned staging table used for partition exchange.
+
+    EXCHANGE PARTITION needs identical columns, so a staging table left
+    behind by an older layout (added columns, widened VARCHAR2s, ROW_HASH
+    from a delta load) is dropped and created again from the target.
+    """
+    staging = f"{table_name}_STG"
+    if table_exists(cursor, staging):
+        if table_column_types(cursor, staging) == table_column_types(cursor, table_name):
+            cursor.execute(f"TRUNCATE TABLE {staging}")
+            return staging
+        cursor.execute(f"DROP TABLE {staging} PURGE")
+        invalidate(staging)
+        logging.info(f"Dropped staging table {staging}; its columns no longer match {table_name}")
+        log_action(f"Dropped staging table {staging}; its columns no longer match {table_name}")
+    cursor.execute(f"CREATE TABLE {staging} NOLOGGING AS SELECT * FROM {table_name} WHERE 1 = 0")
+    invalidate(staging)
+    logging.info(f"Created staging table {staging}")
+    log_action(f"Created staging table {staging}")
+    return staging
+
+def exchange_term_partition(cursor, table_name, staging, term_id):
+    """Swap the loaded staging table in as the term's partition, then empty it."""
+    part = ensure_term_partition(cursor, table_name, term_id)
+    cursor.execute(
+        f"ALTER TABLE {table_name} EXCHANGE PARTITION {part} WITH TABLE {staging} "
+        "WITHOUT VALIDATION UPDATE GLOBAL INDEXES"
+    )
+    logging.info(f"Exchanged {staging} into partition {part} of {table_name}")
+    log_action(f"Exchanged {staging} into partition {part} of {table_name}")
+    # The staging table now holds the previous contents of the partition
+    cursor.execute(f"TRUNCATE TABLE {staging}")
+
+def insert_rows(cursor, table_name, parser, rows, direct_path=False, with_hash=False, batch_errors=False):
+    """Insert parsed row tuples into the table with a single array-bound executemany.
+
+    with_hash means each tuple carries a trailing ROW_HASH value (delta mode).
+    With batch_errors, rows Oracle rejects are skipped instead of failing the
+    whole call; they are returned as (offset in rows, error message).
+    """
+    if not rows:
+        return []
+    columns = parser.columns + ["ROW_HASH"] if with_hash else parser.columns
+    widths = parser.widths + [ROW_HASH_WIDTH] if with_hash else parser.widths
     col_str = ', '.join(columns)
     val_str = ', '.join([f':{i+1}' for i in range(len(columns))])
-    insert_sql = f"INSERT INTO {table_name} ({col_str}) VALUES ({val_str})"
-    for row in rows:
-        values = [row.get(col, '') for col in columns]
-        cursor.execute(insert_sql, values)
+    hint = "/*+ APPEND_VALUES */ " if direct_path else ""
+    insert_sql = f"INSERT {hint}INTO {table_name} ({col_str}) VALUES ({val_str})"
+    # Pre-declare bind widths from the layout so oracledb does not have to
+    # re-size its buffers as it scans the batch.
+    cursor.setinputsizes(*widths)
+    cursor.executemany(insert_sql, rows, batcherrors=batch_errors)
+    if not batch_errors:
+        return []
+    return [(error.offset, error.message) for error in cursor.getbatcherrors()]
+
+# --- Delta loading ---
+
+ROW_HASH_WIDTH = 32
+
+def record_hash(line):
+    """Hash of one record's content.
+
+    The record starts with its natural key (GI01/GI03 and SB00 or EB00), so
+    hashing the whole record identifies both the key and the line content.
+    Line endings are ignored so CRLF and LF copies of a file compare equal.
+    """
+    return hashlib.md5(line.rstrip(b"\r\n")).hexdigest()
+
+def ensure_hash_column(cursor, table_name):
+    """Add the ROW_HASH column (and its term/hash index) used by delta mode."""
+    if add_columns(cursor, table_name, ["ROW_HASH"], f"VARCHAR2({ROW_HASH_WIDTH})"):
+        logging.info(f"Added ROW_HASH column to {table_name}")
+        log_action(f"Added ROW_HASH column to {table_name}")
+        idx_name = f"IDX_{table_name}_ROW_HASH"
+        try:
+            cursor.execute(f"CREATE INDEX {idx_name} ON {table_name} (GI03_TERM_ID, ROW_HASH)")
+            logging.info(f"Created index {idx_name} on {table_name}(GI03_TERM_ID, ROW_HASH)")
+            log_action(f"Created index {idx_name} on {table_name}(GI03_TERM_ID, ROW_HASH)")
+        except Exception as e:
+            if "already exists" not in str(e):
+                logging.error(f"Index creation failed for {idx_name}: {e}")
+                log_action(f"Index creation failed for {idx_name}: {e}")
+
+def loaded_hashes(cursor, table_name, term_id):
+    """Return a Counter of ROW_HASH values already loaded for the term.
+
+    Rows loaded before delta mode have no hash; they are deleted here so the
+    term is rebuilt with hashes on this run.
+    """
+    cursor.execute(
+        f"DELETE FROM {table_name} WHERE GI03_TERM_ID = :1 AND ROW_HASH IS NULL",
+        [term_id]
+    )
+    if cursor.rowcount:
+        logging.info(f"Removed {cursor.rowcount} unhashed rows for term {term_id} in {table_name}")
+        log_action(f"Removed {cursor.rowcount} unhashed rows for term {term_id} in {table_name}")
+    cursor.arraysize = 10000
+    cursor.execute(
+        f"SELECT ROW_HASH, COUNT(*) FROM {table_name} WHERE GI03_TERM_ID = :1 GROUP BY ROW_HASH",
+        [term_id]
+    )
+    return Counter(dict(cursor.fetchall()))
+
+def plan_delta(existing, incoming):
+    """Work out which hashes to delete and how many copies of each to insert.
 
-def load_file(filename, layout, conn, resume_line=0):
+    Identical records are treated as a multiset: if a hash now occurs fewer
+    times, all of its rows are deleted and the new count is reinserted.
+    """
+    to_delete = {h for h, count in existing.items() if count > incoming.get(h, 0)}
+    to_insert = {}
+    for h, count in incoming.items():
+        have = 0 if h in to_delete else existing.get(h, 0)
+        if count > have:
+            to_insert[h] = count - have
+    return to_delete, to_insert
+
+def load_file_delta(filename, parser, conn, file_metrics, batch_size=BATCH_SIZE):
+    """Apply only the changed records of a DAT file. Returns (inserted, deleted)."""
     cursor = conn.cursor()
     table_name = f"MIS_{filename.stem[-2:]}"
     term_id = filename.stem[3:6]
-    ensure_table_exists(cursor, table_name, layout)
-    delete_existing_term(cursor, table_name, term_id)
+    with file_metrics.phase("prepare"):
+        ensure_table_exists(cursor, table_name, parser.layout)
+        ensure_hash_column(cursor, table_name)
+        if is_partitioned(cursor, table_name):
+            ensure_term_partition(cursor, table_name, term_id)
+        existing = loaded_hashes(cursor, table_name, term_id)
+
+    # Pass 1: hash every record
+    with file_metrics.phase("hash"), open(filename, "rb") as f:
+        incoming = Counter(record_hash(line) for line in f)
+    to_delete, to_insert = plan_delta(existing, incoming)
+    logging.info(f"Delta for {filename.name}: {len(to_delete)} record(s) to delete, {sum(to_insert.values())} to insert")
+    log_action(f"Delta for {filename.name}: {len(to_delete)} record(s) to delete, {sum(to_insert.values())} to insert")
+
+    deleted = 0
+    if to_delete:
+        with file_metrics.phase("delete"):
+            cursor.executemany(
+                f"DELETE FROM {table_name} WHERE GI03_TERM_ID = :1 AND ROW_HASH = :2",
+                [(term_id, h) for h in to_delete],
+                arraydmlrowcounts=True
+            )
+            deleted = sum(cursor.getarraydmlrowcounts())
+
+    # Pass 2: insert only the records that are new or changed
+    inserted = 0
     rows = []
-    expected_len = layout[-1][2]
-    short_line_warned = False  # Track if we've warned for this file
-    with open(filename, "r") as f:
-        for i, line in enumerate(f):
-            if i < resume_line:
-                continue
-            if len(line) < expected_len and not short_line_warned:
-                logging.warning(
-                    f"{filename} appears to use an older format: line length {len(line)} (expected {expected_len}). "
-                    "All missing fields will be set to blank for this file."
-                )
-                log_action(
-                    f"{filename} appears to use an older format: line length {len(line)} (expected {expected_len}). "
-                    "All missing fields will be set to blank for this file."
-                )
-                short_line_warned = True
-            row = parse_line(line, layout)
-            rows.append(row)
-            if len(rows) >= 1000:
-                insert_rows(cursor, table_name, layout, rows)
-                conn.commit()
-                rows = []
-                with open(CHECKPOINT_FILE, "w") as cp:
-                    cp.write(f"{filename},{i}\n")
-    if rows:
-        insert_rows(cursor, table_name, layout, rows)
+    line_numbers = []
+    # Rejected records get no row, so the next delta run offers them again
+    rejects = reject_file_for(filename, parser.columns + ["ROW_HASH"])
+    if to_insert:
+        parse = parser.parse
+        with open(filename, "rb") as f:
+            batch_started = time.perf_counter()
+            for line_no, line in enumerate(f, 1):
+                h = record_hash(line)
+                if to_insert.get(h, 0) > 0:
+                    to_insert[h] -= 1
+                    rows.append(parse(line) + (h,))
+                    line_numbers.append(line_no)
+                    if len(rows) >= batch_size:
+                        batch = Batch(rows, 0, 0, time.perf_counter() - batch_started)
+                        inserted += len(rows) - timed_flush(cursor, conn, table_name, parser, batch, False, file_metrics,
+                                                            with_hash=True, commit=False, rejects=rejects,
+                                                            line_numbers=line_numbers)
+                        rows = []
+                        line_numbers = []
+                        batch_started = time.perf_counter()
+        if rows:
+            batch = Batch(rows, 0, 0, time.perf_counter() - batch_started)
+            inserted += len(rows) - timed_flush(cursor, conn, table_name, parser, batch, False, file_metrics,
+                                                with_hash=True, commit=False, rejects=rejects,
+                                                line_numbers=line_numbers)
+    if rejects is not None:
+        rejects.close()
+        if rejects.count:
+            log_action(f"{filename.name}: {rejects.summary()}")
+    with file_metrics.phase("commit"):
         conn.commit()
     cursor.close()
+    logging.info(f"Delta applied to {table_name} for term {term_id}: {deleted} rows deleted, {inserted} rows inserted")
+    log_action(f"Delta applied to {table_name} for term {term_id}: {deleted} rows deleted, {inserted} rows inserted")
+    return inserted, deleted
+
+def prepare_term_reload(cursor, table_name, layout, term_id, strategy=LOAD_STRATEGY, resume=False):
+    """Clear the term according to the load strategy.
+
+    Returns (insert_table, direct_path, strategy) where insert_table is the
+    table rows should be written to and strategy is the one actually used.
+    When resume is set the rows committed by an earlier run are kept.
+    """
+    partitioned = strategy in ("truncate", "exchange")
+    ensure_table_exists(cursor, table_name, layout, term_id=term_id, partitioned=partitioned)
+    if is_partitioned(cursor, table_name):
+        # LIST partitions have no DEFAULT: a new term needs its partition in every strategy
+        ensure_term_partition(cursor, table_name, term_id)
+    elif partitioned:
+        logging.warning(f"{table_name} is not partitioned; using DELETE instead of {strategy}")
+        log_action(f"{table_name} is not partitioned; using DELETE instead of {strategy}")
+        strategy = "delete"
+    if resume:
+        if strategy == "exchange":
+            return f"{table_name}_STG", True, strategy
+        return table_name, False, strategy
+    if strategy == "exchange":
+        return prepare_staging_table(cursor, table_name), True, strategy
+    if strategy == "truncate":
+        truncate_term_partition(cursor, table_name, term_id)
+        return table_name, False, strategy
+    delete_existing_term(cursor, table_name, term_id)
+    return table_name, False, "delete"
+
+def committed_rows(cursor, table_name, term_id):
+    """Rows of the term already in the table; the source of truth when resuming."""
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name} WHERE GI03_TERM_ID = :1", [term_id])
+    return cursor.fetchone()[0]
+
+def load_file(filename, parser, conn, resume_line=0, batch_size=BATCH_SIZE, content_hash=None, file_metrics=None):
+    """Load one DAT file into its MIS_xx table. Returns the number of rows inserted.
+
+    parser is the file type's CompiledLayout; each line is parsed straight
+    into a bind-ready tuple. A resume_line above 0 continues a partial load:
+    the term is not cleared and loading restarts after the rows the table
+    already holds. The lines processed are checkpointed after every batch.
+    Rows Oracle rejects go to the file's reject file and do not count as
+    inserted.
+    """
+    if file_metrics is None:
+        file_metrics = METRICS.start_file(filename.name, bytes_total=filename.stat().st_size)
+    layout = parser.layout
+    cursor = conn.cursor()
+    table_name = f"MIS_{filename.stem[-2:]}"
+    term_id = filename.stem[3:6]
+    file_metrics.table = table_name
+    resume = resume_line > 0
+    with file_metrics.phase("prepare"):
+        insert_table, direct_path, strategy = prepare_term_reload(
+            cursor, table_name, layout, term_id, resume=resume
+        )
+        rejected_before = 0
+        if resume:
+            # The checkpoint is written after the commit, so the table may be one
+            # batch ahead of it. Count what is actually there to avoid duplicates;
+            # rejected lines were processed but are not in the table.
+            rejected_before = read_checkpoints().get(filename.name, {}).get("rejected", 0)
+            in_table = committed_rows(cursor, insert_table, term_id) + rejected_before
+            if in_table != resume_line and (BATCH_ERRORS or rejected_before):
+                # The batch committed after the checkpoint may have had rejected lines,
+                # which the count cannot see: resuming could insert good rows twice
+                logging.warning(f"Checkpoint for {filename.name} says {resume_line} lines, {insert_table} accounts for {in_table}; reloading the term")
+                log_action(f"Checkpoint for {filename.name} says {resume_line} lines, {insert_table} accounts for {in_table}; reloading the term")
+                insert_table, direct_path, strategy = prepare_term_reload(cursor, table_name, layout, term_id)
+                rejected_before = 0
+                in_table = 0
+            elif in_table != resume_line:
+                logging.warning(f"Checkpoint for {filename.name} says {resume_line} rows, {insert_table} holds {in_table}; resuming at {in_table}")
+                log_action(f"Checkpoint for {filename.name} says {resume_line} rows, {insert_table} holds {in_table}; resuming at {in_table}")
+            resume_line = in_table
+
+    # Staging tables for exchange have no indexes, so there is nothing to defer
+    index_mode = "maintain"
+    if INDEX_MODE != "maintain" and strategy != "exchange":
+        if filename.stat().st_size >= INDEX_DEFER_MIN_MB * 1024 * 1024:
+            with file_metrics.phase("index defer"):
+                # Index DDL commits the term clear-out; the checkpoint still restarts from 0
+                index_mode = defer_indexes(cursor, table_name, layout)
+
+    # Reader/parser thread feeds ready-to-bind batches to this (insert) thread
+    row_count = 0
+    rejected = rejected_before
+    tuner = batch_tuner_for(table_name, parser, batch_size)
+    rejects = reject_file_for(filename, parser.columns)
+    try:
+        for batch in pipelined(read_batches(filename, parser, resume_line, tuner)):
+            batch_rejected = timed_flush(cursor, conn, insert_table, parser, batch, direct_path, file_metrics,
+                                         tuner=tuner, rejects=rejects)
+            row_count += len(batch.rows) - batch_rejected
+            rejected += batch_rejected
+            if content_hash:
+                write_checkpoint(filename, content_hash, batch.next_line, rejected=rejected)
+    finally:
+        if rejects is not None:
+            rejects.close()
+    if rejects is not None and rejects.count:
+        log_action(f"{filename.name}: {rejects.summary()}")
+    file_metrics.batch_size = tuner.size
+    if strategy == "exchange":
+        with file_metrics.phase("exchange"):
+            exchange_term_partition(cursor, table_name, insert_table, term_id)
+    else:
+        with file_metrics.phase("index rebuild"):
+            rebuild_indexes(cursor, table_name, layout, index_mode)
+    log_phase_timings(filename, file_metrics.phases)
+    cursor.close()
+    return row_count
+
+# --- SQLite target ---
+
+def get_sqlite_connection(path=SQLITE_PATH):
+    """Open the local SQLite database in WAL mode for bulk loading."""
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    logging.info(f"Connected to SQLite database {path}")
+    return conn
+
+def ensure_sqlite_table(cursor, table_name, layout):
+    """Create the SQLite copy of an MIS_xx table and its key indexes if missing."""
+    columns = ', '.join([f'{name} TEXT' for name, _, _ in layout])
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {table_name} ({columns})')
+    for col in INDEX_FIELDS:
+        if any(col == name for name, _, _ in layout):
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS IDX_{table_name}_{col} ON {table_name} ({col})')
+
+def load_file_sqlite(filename, parser, conn, file_metrics, batch_size=BATCH_SIZE):
+    """Load one DAT file into the SQLite copy of its table in a single transaction.
+
+    Returns the number of rows inserted.
+    """
+    cursor = conn.cursor()
+    table_name = f"MIS_{filename.stem[-2:]}"
+    term_id = filename.stem[3:6]
+    col_str = ', '.join(parser.columns)
+    val_str = ', '.join(['?'] * len(parser.columns))
+    insert_sql = f"INSERT INTO {table_name} ({col_str}) VALUES ({val_str})"
+    with file_metrics.phase("prepare"):
+        ensure_sqlite_table(cursor, table_name, parser.layout)
+        cursor.execute(f"DELETE FROM {table_name} WHERE GI03_TERM_ID = ?", [term_id])
+    row_count = 0
+    try:
+        for batch in pipelined(read_batches(filename, parser, batch_size=batch_size)):
+            started = time.perf_counter()
+            cursor.executemany(insert_sql, batch.rows)
+            inserted = time.perf_counter()
+            file_metrics.add_phase("parse", batch.parse_seconds)
+            file_metrics.add_phase("insert", inserted - started)
+            file_metrics.add_batch(len(batch.rows), batch.parse_seconds + inserted - started, batch.bytes_read,
+                                   parse=batch.parse_seconds, insert=inserted - started)
+            row_count += len(batch.rows)
+        with file_metrics.phase("commit"):
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return row_count
+
+def load_to_sqlite(file, parser, conn):
+    """Load one file into the SQLite target and return (rows, seconds). The file stays in pending."""
+    file_metrics = METRICS.start_file(file.name, f"MIS_{file.stem[-2:]}", file.stat().st_size)
+    started = time.perf_counter()
+    logging.info(f"Loading {file.name} into SQLite {SQLITE_PATH.name}...")
+    log_action(f"Loading {file.name} into SQLite {SQLITE_PATH.name}...")
+    try:
+        loaded = load_file_sqlite(file, parser, conn, file_metrics)
+    except Exception as e:
+        file_metrics.fail(e)
+        file_metrics.finish()
+        raise
+    file_metrics.finish(loaded)
+    elapsed = time.perf_counter() - started
+    rate = loaded / elapsed if elapsed > 0 else 0
+    logging.info(f"Loaded {loaded} rows from {file.name} into SQLite in {elapsed:.1f}s ({rate:,.0f} rows/sec)")
+    log_action(f"Loaded {loaded} rows from {file.name} into SQLite in {elapsed:.1f}s ({rate:,.0f} rows/sec)")
+    return loaded, elapsed
+
+def resume_point(file, content_hash):
+    """Work out where to start a file from its checkpoint.
+
+    Returns None if the file already finished loading, otherwise the number
+    of rows committed by an earlier run (0 for a fresh load). A checkpoint
+    for different file content is ignored.
+    """
+    checkpoint = read_checkpoints().get(file.name)
+    if not checkpoint:
+        return 0
+    if checkpoint.get("sha256") != content_hash:
+        logging.info(f"Checkpoint for {file.name} is for different content; reloading from the start.")
+        log_action(f"Checkpoint for {file.name} is for different content; reloading from the start.")
+        return 0
+    if checkpoint.get("status") == "done":
+        return None
+    return int(checkpoint.get("rows", 0))
+
+def touch_stats(table_name, term_id):
+    """Queue post-load statistics for the term's partition (or the whole table)."""
+    STATS.touch(table_name, partition_name(term_id) if term_id.isalnum() else None)
+
+def load_and_complete(file, parser, conn):
+    """Load one file (resuming from its checkpoint), move it to completed and return (rows, seconds)."""
+    table_name = f"MIS_{file.stem[-2:]}"
+    file_metrics = METRICS.start_file(file.name, table_name, file.stat().st_size)
+    file_metrics.start_round_trips(conn)
+    started = time.perf_counter()
+    try:
+        with file_metrics.phase("hash file"):
+            content_hash = file_sha256(file)
+        loaded_before = find_load(conn, table_name, content_hash)
+        start_line = resume_point(file, content_hash)
+        if loaded_before:
+            logging.info(f"{file.name} is already the current load of {table_name} for term {loaded_before['scope']} "
+                         f"({loaded_before['file']}, {loaded_before['loaded_at']}); skipping load.")
+            log_action(f"{file.name} is already the current load of {table_name} for term {loaded_before['scope']}; skipping load.")
+            loaded = 0
+        elif start_line is None:
+            logging.info(f"{file.name} already finished loading in an earlier run; skipping load.")
+            log_action(f"{file.name} already finished loading in an earlier run; skipping load.")
+            loaded = 0
+        elif DELTA_MODE:
+            # Delta loads are idempotent, so there is no partial state to resume
+            logging.info(f"Loading {file.name} (delta mode)...")
+            log_action(f"Loading {file.name} (delta mode)...")
+            loaded, _ = load_file_delta(file, parser, conn, file_metrics)
+            record_load(conn, table_name, file.stem[3:6], content_hash, file.name, "dat_loader",
+                        loaded, time.perf_counter() - started)
+            touch_stats(table_name, file.stem[3:6])
+            write_checkpoint(file, content_hash, loaded, status="done")
+        else:
+            logging.info(f"Loading {file.name} (starting at line {start_line})...")
+            log_action(f"Loading {file.name} (starting at line {start_line})...")
+            loaded = load_file(file, parser, conn, resume_line=start_line,
+                               content_hash=content_hash, file_metrics=file_metrics)
+            record_load(conn, table_name, file.stem[3:6], content_hash, file.name, "dat_loader",
+                        start_line + loaded, time.perf_counter() - started)
+            touch_stats(table_name, file.stem[3:6])
+            write_checkpoint(file, content_hash, start_line + loaded, status="done")
+    except Exception as e:
+        file_metrics.fail(e)
+        file_metrics.finish()
+        raise
+    file_metrics.stop_round_trips(conn)
+    file_metrics.finish(loaded)
+    elapsed = time.perf_counter() - started
+    rate = loaded / elapsed if elapsed > 0 else 0
+    logging.info(f"Loaded {loaded} rows from {file.name} in {elapsed:.1f}s ({rate:,.0f} rows/sec)")
+    log_action(f"Loaded {loaded} rows from {file.name} in {elapsed:.1f}s ({rate:,.0f} rows/sec)")
+    # After successful load, move file to completed
+    try:
+        shutil.move(str(file), COMPLETED_DIR / file.name)
+        logging.info(f"Moved {file.name} to completed folder.")
+        log_action(f"Moved {file.name} to completed folder.")
+        clear_checkpoint(file)
+    except Exception as e:
+        logging.error(f"Failed to move {file.name} to completed: {e}")
+        log_action(f"Failed to move {file.name} to completed: {e}")
+    return loaded, elapsed
+
+def load_table_group(table_files):
+    """Load every file for one MIS_xx table on a pooled connection, in order.
+
+    Files for different tables are independent, so each group can run on its
+    own worker. Returns a list of (file, rows, seconds, error) results.
+    """
+    results = []
+    with pooled_connection("dwh") as conn:
+        for file, parser in table_files:
+            try:
+                loaded, elapsed = load_and_complete(file, parser, conn)
+                results.append((file, loaded, elapsed, None))
+            except Exception as e:
+                logging.error(f"Error loading {file.name}: {e}")
+                log_action(f"Error loading {file.name}: {e}")
+                conn.rollback()
+                results.append((file, 0, 0.0, e))
+                break  # Later files for this table stay in pending
+    # The table is done; refresh its statistics while the other groups keep loading
+    STATS.gather(f"MIS_{table_files[0][0].stem[-2:]}")
+    return results
+
+def run_parallel(load_plan, workers):
+    """Load independent MIS_xx tables concurrently over one shared pool."""
+    groups = defaultdict(list)
+    for file, parser in load_plan:
+        groups[f"MIS_{file.stem[-2:]}"].append((file, parser))
+    workers = max(1, min(workers, len(groups)))
+    if get_pool("dwh", pool_min=1, pool_max=workers, pool_inc=1) is None:
+        raise RuntimeError("Could not create DWH connection pool")
+    # Open the workers' sessions up front instead of one by one as they start
+    warm_up("dwh", workers)
+    logging.info(f"Parallel mode: {len(groups)} table(s) across {workers} worker(s)")
+    log_action(f"Parallel mode: {len(groups)} table(s) across {workers} worker(s)")
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(load_table_group, table_files): table_name
+                   for table_name, table_files in groups.items()}
+        for future in as_completed(futures):
+            table_name = futures[future]
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                # load_table_group handles file errors; this is a failure to get a connection
+                logging.error(f"Error loading {table_name}: {e}")
+                log_action(f"Error loading {table_name}: {e}")
+                results.extend((file, 0, 0.0, e) for file, _ in groups[table_name])
+    return results
+
+def run_sqlite(load_plan):
+    """Load every file into the local SQLite database over one connection."""
+    results = []
+    conn = get_sqlite_connection()
+    try:
+        for file, parser in load_plan:
+            try:
+                loaded, elapsed = load_to_sqlite(file, parser, conn)
+                results.append((file, loaded, elapsed, None))
+            except Exception as e:
+                logging.error(f"Error loading {file.name} into SQLite: {e}")
+                log_action(f"Error loading {file.name} into SQLite: {e}")
+                results.append((file, 0, 0.0, e))
+    finally:
+        conn.close()
+    return results
+
+def run_sequential(load_plan):
+    """Load files one after another, stopping at the first error."""
+    results = []
+    for file, parser in load_plan:
+        # Pooled, so every file after the first reuses the same session
+        conn = get_connection("dwh", use_pool=True)
+        try:
+            loaded, elapsed = load_and_complete(file, parser, conn)
+            results.append((file, loaded, elapsed, None))
+        except Exception as e:
+            logging.error(f"Error loading {file.name}: {e}")
+            log_action(f"Error loading {file.name}: {e}")
+            results.append((file, 0, 0.0, e))
+            break  # Stop on error so you can resume later
+        finally:
+            conn.close()
+    return results
+
+def report_results(results, wall_elapsed):
+    """Print the combined end-of-run report."""
+    total_rows = sum(rows for _, rows, _, _ in results)
+    failed = [file for file, _, _, error in results if error is not None]
+    logging.info("===== DAT Loader summary =====")
+    for line in METRICS.finish(batch_size=BATCH_SIZE, workers=PARALLEL_WORKERS):
+        logging.info(line)
+    for file, _, _, error in results:
+        if error is not None:
+            logging.info(f"  {file.name} failed: {error}")
+    logging.info(f"Metrics written to {METRICS_FILE}")
+    rate = total_rows / wall_elapsed if wall_elapsed > 0 else 0
+    logging.info(f"Summary: {total_rows} rows loaded in {wall_elapsed:.1f}s ({rate:,.0f} rows/sec, starting batch size {BATCH_SIZE})")
+    log_action(f"Summary: {total_rows} rows loaded in {wall_elapsed:.1f}s ({rate:,.0f} rows/sec, starting batch size {BATCH_SIZE})")
+    if failed:
+        log_action(f"Failed files: {', '.join(f.name for f in failed)}")
+    return not failed
 
 def main():
     log_action("===== DAT Loader script started =====")
-# Resume logic (commented out for future use)
-# resume_file, resume_line = None, 0
-# if Path(CHECKPOINT_FILE).exists():
-#     with open(CHECKPOINT_FILE) as cp:
-#         line = cp.read().strip()
-#         if line:
-#             resume_file, resume_line = line.split(",")
-#             resume_line = int(resume_line)
 
     files = sorted(
         [f for f in DATA_DIR.glob("U8*.*") if f.suffix.lower() == ".dat"],
         reverse=LOAD_MOST_RECENT_FIRST
     )
 
+    load_plan = []
     for file in files:
         layout_key = file.stem[-2:]
         if layout_key in ("TX", "CC"):
@@ -192,38 +1021,30 @@ def main():
             log_action(f"Skipping {file.name}: file type {layout_key} is ignored.")
             continue
 
-        layout = LAYOUTS.get(layout_key)
-        if not layout:
+        parser = get_compiled_layout(layout_key)
+        if not parser:
             logging.warning(f"Skipping {file.name}: no layout found.")
             log_action(f"Skipping {file.name}: no layout found.")
             continue
+        load_plan.append((file, parser))
 
-        # Always reload the entire file if resuming
-        start_line = 0
-        logging.info(f"Loading {file.name} (starting at line {start_line})...")
-        log_action(f"Loading {file.name} (starting at line {start_line})...")
-        conn = get_connection("dwh") 
-        try:
-            load_file(file, layout, conn, resume_line=start_line)
-            # After successful load, move file to completed
-            try:
-                shutil.move(str(file), COMPLETED_DIR / file.name)
-                logging.info(f"Moved {file.name} to completed folder.")
-                log_action(f"Moved {file.name} to completed folder.")
-                # Remove checkpoint file if it exists
-                if Path(CHECKPOINT_FILE).exists():
-                    Path(CHECKPOINT_FILE).unlink()
-            except Exception as e:
-                logging.error(f"Failed to move {file.name} to completed: {e}")
-                log_action(f"Failed to move {file.name} to completed: {e}")
-        except Exception as e:
-            logging.error(f"Error loading {file.name}: {e}")
-            log_action(f"Error loading {file.name}: {e}")
-            log_action("===== DAT Loader script finished with error =====")
-            break  # Stop on error so you can resume later
-        finally:
-            conn.close()
-    log_action("===== DAT Loader script finished =====")
+    started = time.perf_counter()
+    if LOAD_TARGET == "sqlite":
+        # SQLite has a single writer, so parallel/delta/partition options do not apply
+        results = run_sqlite(load_plan)
+    elif PARALLEL_WORKERS > 1 and len(load_plan) > 1:
+        results = run_parallel(load_plan, PARALLEL_WORKERS)
+    else:
+        results = run_sequential(load_plan)
+    STATS.gather()
+    ok = report_results(results, time.perf_counter() - started)
+    for line in STATS.wait():
+        log_action(line)
+
+    if ok:
+        log_action("===== DAT Loader script finished =====")
+    else:
+        log_action("===== DAT Loader script finished with error =====")
         
 if __name__ == "__main__":
     try:
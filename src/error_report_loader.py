@@ -5,10 +5,22 @@ from pathlib import Path
 import shutil
 import csv
 import os
+import time
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add the parent directory to Python path so we can import from libs
 sys.path.append(str(Path(__file__).parent.parent))
-from libs.oracle_db_connector import get_connection
+from libs.oracle_db_connector import get_connection, get_pool, warm_up, is_transient_error
+from libs.load_metrics import LoadMetrics
+from libs.batch_tuner import BatchTuner, estimate_row_bytes
+from libs.schema_cache import table_exists, table_columns, table_column_types, add_columns, invalidate
+from libs.load_ledger import file_sha256, find_load, record_load
+from libs.table_stats import PostLoadStats
+from libs.reject_file import RejectFile
+from libs.tabular_io import frame_rows
+from libs.schema_inference import infer_column_types, convert_frame, column_widths, widen_to, all_text, can_need_widening
 
 # --- Setup paths relative to CLI structure ---
 BASE_DIR = os.environ.get("MIS_INSTANCE_PATH", os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -25,16 +37,26 @@ COMPLETED_DIR.mkdir(parents=True, exist_ok=True)
 
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 LOG_FILE = LOG_DIR / f"error_report_loader_{timestamp}.log"
+METRICS_FILE = LOG_DIR / f"error_report_loader_{timestamp}.metrics.jsonl"
 CHECKPOINT_FILE = LOG_DIR / "error_loader_checkpoint.txt"
 
+# Reports loaded at once; 1 keeps the original one-by-one, stop-on-error run
+WORKERS = int(os.environ.get("MIS_ERROR_WORKERS", "1"))
+# Attempts per report when Oracle reports a transient error, and the base back-off
+RETRIES = int(os.environ.get("MIS_ERROR_RETRIES", "3"))
+RETRY_DELAY = float(os.environ.get("MIS_ERROR_RETRY_DELAY", "2"))
+
+_log_lock = threading.Lock()
+
 def log_action(action):
     from datetime import datetime
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     message = f"{timestamp} - {action}\n"
-    with open(MASTER_LOG, "a", encoding="utf-8") as f:
-        f.write(message)
-    with open(HISTORY_LOG, "a", encoding="utf-8") as f:
-        f.write(message)
+    with _log_lock:
+        with open(MASTER_LOG, "a", encoding="utf-8") as f:
+            f.write(message)
+        with open(HISTORY_LOG, "a", encoding="utf-8") as f:
+            f.write(message)
 
 # Remove any existing handlers first
 for handler in logging.root.handlers[:]:
@@ -56,113 +78,401 @@ logging.getLogger().addHandler(console)
 logging.info("Logging initialized. Log file: %s", LOG_FILE)
 log_action(f"Logging initialized. Log file: {LOG_FILE}")
 
+METRICS = LoadMetrics("error_report_loader", METRICS_FILE)
+STATS = PostLoadStats("error_report_loader")
+
 TABLE_NAME = "MIS_ERROR_REPORTS"
+# Skip rows Oracle rejects (written to a reject file next to the log) instead of failing the whole report
+BATCH_ERRORS = os.environ.get("MIS_ERROR_BATCH_ERRORS", "1") == "1"
+# Composite index on the pre-load delete key (REPORT_NO, TERM_ID, COLLEGE_ID).
+# The columns are VARCHAR2(4000), too wide for a plain composite index key,
+# so the index covers a prefix of each and the delete repeats that expression.
+KEY_INDEX = os.environ.get("MIS_ERROR_KEY_INDEX", "1") == "1"
+KEY_INDEX_NAME = f"{TABLE_NAME}_KEY_IX"
+KEY_PREFIX = 64
+KEY_COLUMNS = ("REPORT_NO", "TERM_ID", "COLLEGE_ID")
 
 # --- Helper functions ---
-def ensure_table_exists(cursor, columns):
-    cursor.execute("""
-        SELECT COUNT(*) FROM all_tables 
-        WHERE table_name = :1 AND owner = USER
-    """, [TABLE_NAME.upper()])
-    exists = cursor.fetchone()[0] > 0
-    
-    if not exists:
+def ensure_table_exists(cursor, columns, sample):
+    """Create the table, or add the report's new columns, with types inferred from sample."""
+    if not table_exists(cursor, TABLE_NAME):
         # Create new table
-        col_defs = [f'{col} VARCHAR2(4000)' for col in columns]
+        types = infer_column_types(TABLE_NAME, sample, columns, text_columns=KEY_COLUMNS)
+        col_defs = [f'{col} {types[col]}' for col in columns]
         create_sql = f'CREATE TABLE {TABLE_NAME} ({", ".join(col_defs)})'
         cursor.execute(create_sql)
+        invalidate(TABLE_NAME)
         logging.info(f"Created table {TABLE_NAME}")
         log_action(f"Created table {TABLE_NAME}")
     else:
-        # Check for missing columns and add them
-        cursor.execute("""
-            SELECT column_name FROM all_tab_columns 
-            WHERE table_name = :1 AND owner = USER
-        """, [TABLE_NAME.upper()])
-        existing_columns = {row[0] for row in cursor.fetchall()}
-        
-        for col in columns:
-            if col.upper() not in existing_columns:
-                alter_sql = f'ALTER TABLE {TABLE_NAME} ADD ({col} VARCHAR2(4000))'
-                cursor.execute(alter_sql)
-                logging.info(f"Added column {col} to existing table {TABLE_NAME}")
-                log_action(f"Added column {col} to existing table {TABLE_NAME}")
-
-def insert_rows(cursor, columns, rows):
+        # Add any missing columns in one ALTER
+        existing = table_columns(cursor, TABLE_NAME)
+        new = [col for col in columns if col.upper() not in existing]
+        types = infer_column_types(TABLE_NAME, sample, new, text_columns=KEY_COLUMNS) if new else {}
+        added = add_columns(cursor, TABLE_NAME, columns, column_types=types)
+        if added:
+            logging.info(f"Added column(s) {', '.join(added)} to existing table {TABLE_NAME}")
+            log_action(f"Added column(s) {', '.join(added)} to existing table {TABLE_NAME}")
+
+def key_expr(column):
+    return f"SUBSTR({column}, 1, {KEY_PREFIX})"
+
+def ensure_key_index(cursor):
+    """Create the delete-key index if it is missing; returns True when created."""
+    cursor.execute("SELECT COUNT(*) FROM user_indexes WHERE index_name = :1", [KEY_INDEX_NAME])
+    if cursor.fetchone()[0] > 0:
+        return False
+    exprs = ", ".join(key_expr(col) for col in KEY_COLUMNS)
+    cursor.execute(f"CREATE INDEX {KEY_INDEX_NAME} ON {TABLE_NAME} ({exprs})")
+    logging.info(f"Created index {KEY_INDEX_NAME} on {TABLE_NAME} ({', '.join(KEY_COLUMNS)})")
+    log_action(f"Created index {KEY_INDEX_NAME} on {TABLE_NAME} ({', '.join(KEY_COLUMNS)})")
+    return True
+
+def delete_reports_statement(report_no, pairs):
+    """The DELETE for a report's (TERM_ID, COLLEGE_ID) pairs and its executemany rows.
+
+    Each key is used twice in the statement, so the binds are named: in SQL
+    (unlike PL/SQL) a repeated positional placeholder is a separate bind.
+    """
+    # The prefix predicates match the key index; the full ones keep the delete exact
+    predicates = " AND ".join(
+        f"{key_expr(col)} = SUBSTR(:{col.lower()}, 1, {KEY_PREFIX}) AND {col} = :{col.lower()}"
+        for col in KEY_COLUMNS
+    )
+    keys = [
+        {"report_no": str(report_no), "term_id": term_id, "college_id": college_id}
+        for term_id, college_id in sorted(pairs)
+    ]
+    return f"DELETE FROM {TABLE_NAME} WHERE {predicates}", keys
+
+def delete_existing_reports(cursor, report_no, pairs):
+    """Delete every (REPORT_NO, TERM_ID, COLLEGE_ID) key of a report in one array-bound call.
+
+    Keys are bound as strings so Oracle compares them against the VARCHAR2
+    columns directly and can use the key index. Returns the rows deleted.
+    """
+    if not pairs:
+        return 0
+    sql, keys = delete_reports_statement(report_no, pairs)
+    cursor.executemany(sql, keys, arraydmlrowcounts=True)
+    return sum(cursor.getarraydmlrowcounts())
+
+def insert_rows(cursor, columns, rows, batch_errors=BATCH_ERRORS):
+    """Insert rows with one array-bound executemany.
+
+    With batch_errors, rows Oracle rejects are skipped instead of failing the
+    whole call; they are returned as (offset in rows, error message).
+    """
     col_str = ', '.join(columns)
     val_str = ', '.join([f':{i+1}' for i in range(len(columns))])
     insert_sql = f"INSERT INTO {TABLE_NAME} ({col_str}) VALUES ({val_str})"
-    for row in rows:
-        cursor.execute(insert_sql, row)
+    cursor.executemany(insert_sql, rows, batcherrors=batch_errors)
+    if not batch_errors:
+        return []
+    return [(error.offset, error.message) for error in cursor.getbatcherrors()]
+
+def log_info(message):
+    logging.info(message)
+    log_action(message)
+
+def read_report(csvfile, report_no, activity_date, resume_line=0, rejects=None):
+    """Read an error report in one pass.
+
+    Returns (columns, frame, unique (Term Id, College Id) pairs, first term
+    id). frame holds the table columns, indexed by CSV line number. Rows
+    with more or fewer fields than the header are not loaded: they are
+    written to rejects, or just skipped when rejects is None.
+    """
+    reader = csv.reader(csvfile)
+    headers = next(reader)
+    width = len(headers)
+    columns = report_columns(headers)
+    if rejects is not None:
+        # Reject files list the table columns, known only once the header is read
+        rejects.columns = columns
+    term_id_idx = headers.index('Term Id')
+    college_id_idx = headers.index('College Id')
+    unique_pairs = set()
+    term_id_for_folder = None
+    rows = []
+    line_numbers = []
+    for i, row in enumerate(reader):
+        if i < resume_line:
+            continue
+        # Data rows start on line 2, after the header
+        line_no = i + 2
+        if len(row) != width:
+            if rejects is not None:
+                rejects.add(line_no, f"Expected {width} fields, found {len(row)}", [report_no] + row + [activity_date])
+            continue
+        term_id = row[term_id_idx].strip()
+        unique_pairs.add((term_id, row[college_id_idx].strip()))
+        if term_id_for_folder is None:
+            term_id_for_folder = term_id
+        rows.append(row)
+        line_numbers.append(line_no)
+    frame = pd.DataFrame(rows, columns=columns[1:-1], index=line_numbers)
+    del rows
+    # REPORT_NO at the beginning and ACTIVITY_DATE at the end (far right)
+    frame.insert(0, 'REPORT_NO', report_no)
+    frame['ACTIVITY_DATE'] = activity_date
+    return columns, frame, unique_pairs, term_id_for_folder
+
+def report_columns(headers):
+    """Table columns of a report: REPORT_NO, the CSV headers, then ACTIVITY_DATE at the far right."""
+    return ['REPORT_NO'] + [h.replace(' ', '_').upper() for h in headers] + ['ACTIVITY_DATE']
+
+def prepare_table(cursor, columns, sample, widths):
+    """Create the table (or add columns), widen it and add the key index.
+
+    This is DDL: it commits the session's transaction and waits for other
+    sessions' DML on the table, so it runs before a report's delete and,
+    for concurrent loads, once for all reports before the workers start.
+    """
+    ensure_table_exists(cursor, columns, sample)
+    widen_to(cursor, TABLE_NAME, widths)
+    if KEY_INDEX:
+        ensure_key_index(cursor)
+
+def scan_report(file_path, activity_date):
+    """Columns and frame of one report for prepare_for_reports, or None when it cannot be read."""
+    try:
+        report_no = int(file_path.stem.split('_')[1])
+        with open(file_path, newline='', encoding='utf-8-sig') as csvfile:
+            columns, frame, _, _ = read_report(csvfile, report_no, activity_date)
+    except Exception as e:
+        # The report fails again, and is reported, when it is loaded
+        log_action(f"Could not scan {file_path.name} before loading: {e}")
+        return None
+    return columns, frame
+
+def prepare_for_reports(files, workers=1):
+    """Run the DDL every report needs once, from all of their columns and widest values.
+
+    Only reports that can need DDL are read in full, on `workers` threads:
+    those with columns the table lacks and those with a field wider than
+    its column (see can_need_widening).
+    """
+    activity_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn = get_connection("dwh", use_pool=True)
+    if not conn:
+        raise ConnectionError("Failed to connect to Data Warehouse database")
+    try:
+        cursor = conn.cursor()
+        table_types = table_column_types(cursor, TABLE_NAME)
+        to_scan = []
+        for file_path in files:
+            try:
+                with open(file_path, newline='', encoding='utf-8-sig') as csvfile:
+                    columns = report_columns(next(csv.reader(csvfile)))
+                # The CSV's fields are the columns between REPORT_NO and ACTIVITY_DATE
+                if can_need_widening(table_types, file_path, columns[1:-1]):
+                    to_scan.append(file_path)
+            except Exception:
+                # The scan logs why the report cannot be read
+                to_scan.append(file_path)
+        columns = []
+        samples = {}
+        widths = {}
+        if to_scan:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(to_scan)))) as executor:
+                for found in executor.map(lambda file_path: scan_report(file_path, activity_date), to_scan):
+                    if found is None:
+                        continue
+                    report_cols, frame = found
+                    for col in report_cols:
+                        if col not in samples:
+                            # New columns get types from the first report that has them
+                            samples[col] = frame[col]
+                            columns.append(col)
+                    column_widths(frame, report_cols, widths)
+        if columns:
+            prepare_table(cursor, columns, pd.DataFrame(samples), widths)
+        elif KEY_INDEX:
+            # The table already fits every report; the workers still rely on the key index
+            ensure_key_index(cursor)
+        cursor.close()
+    finally:
+        conn.close()
+    log_info(f"Prepared {TABLE_NAME} for {len(files)} report(s), {len(to_scan)} read in full")
+
+def load_report(conn, file_path, report_no, columns, frame, unique_pairs, file_metrics, content_hash, started,
+                rejects, prepared=False):
+    """Replace one report's rows in a single transaction, recorded in the load ledger.
+
+    frame comes from read_report. Rows Oracle rejects are written to rejects
+    and the rest are committed. Unless prepared (prepare_for_reports ran for
+    this report) the table DDL runs first, before the delete. Returns the
+    number of rows Oracle rejected.
+    """
+    file_metrics.start_round_trips(conn)
+    cursor = conn.cursor()
+    if not prepared:
+        with file_metrics.phase("prepare"):
+            prepare_table(cursor, columns, frame, column_widths(frame, columns))
+    # NUMBER/DATE columns (set in the override file) get numbers and dates; all-text tables take the values as read
+    table_types = table_column_types(cursor, TABLE_NAME)
+    line_numbers = frame.index.tolist()
+    if not all_text(table_types, columns):
+        with file_metrics.phase("convert"):
+            frame = convert_frame(frame, table_types, columns)
+    rows = frame_rows(frame, columns)
+    del frame
+    
+    with file_metrics.phase("delete"):
+        deleted = delete_existing_reports(cursor, report_no, unique_pairs)
+        logging.info(f"Deleted {deleted} existing record(s) for REPORT_NO={report_no} across {len(unique_pairs)} term/college pair(s)")
+        log_action(f"Deleted {deleted} existing record(s) for REPORT_NO={report_no} across {len(unique_pairs)} term/college pair(s)")
+    
+    # Array-bound inserts in tuner-sized batches; the delete and all inserts commit together
+    # Error report values are short codes and messages; assume ~32 characters each
+    tuner = BatchTuner(file_path.name, initial=1000, row_bytes=estimate_row_bytes([32] * len(columns)), log=log_info)
+    rejected = 0
+    sent = 0
+    while sent < len(rows):
+        size = tuner.next_size()
+        batch = rows[sent:sent + size]
+        batch_started = time.perf_counter()
+        errors = insert_rows(cursor, columns, batch)
+        seconds = time.perf_counter() - batch_started
+        tuner.record(len(batch), seconds, size=size)
+        file_metrics.add_phase("insert", seconds)
+        file_metrics.add_batch(len(batch) - len(errors), seconds, insert=seconds)
+        if errors:
+            rejected += rejects.add_batch(errors, batch, line_numbers[sent:sent + len(batch)])
+        sent += len(batch)
+    file_metrics.rejected += rejected
+    file_metrics.batch_size = tuner.size
+    with file_metrics.phase("commit"):
+        seconds = time.perf_counter() - started
+        record_load(conn, TABLE_NAME, f"REPORT {report_no}", content_hash, file_path.name,
+                    "error_report_loader", len(rows) - rejected, seconds)
+    STATS.touch(TABLE_NAME)
+    file_metrics.stop_round_trips(conn)
+    cursor.close()
+    return rejected
 
-def process_file(file_path, resume_line=0):
+def process_file(file_path, resume_line=0, checkpoint=True, prepared=False):
     report_no = int(file_path.stem.split('_')[1])
     activity_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    file_metrics = METRICS.start_file(file_path.name, TABLE_NAME, file_path.stat().st_size)
+    started = time.perf_counter()
+    rejected = 0
+    term_id_for_folder = None
+    loaded_before = None
+    # Malformed rows and rows Oracle refuses; read_report sets the columns, and
+    # the file is only created on the first reject
+    rejects = RejectFile(LOG_DIR / f"{file_path.stem}_{timestamp}.rejects.csv", [])
     
-    with open(file_path, newline='', encoding='utf-8-sig') as csvfile:
-        reader = csv.reader(csvfile)
-        headers = next(reader)
-        # Put ACTIVITY_DATE at the end (far right)
-        columns = ['REPORT_NO'] + [h.replace(' ', '_').upper() for h in headers] + ['ACTIVITY_DATE']
-        
+    try:
         # Use centralized database connector for DWH connection
-        conn = get_connection("dwh")
+        conn = get_connection("dwh", use_pool=True)
         if not conn:
             logging.error("❌ Failed to connect to Data Warehouse database")
             log_action("❌ Failed to connect to Data Warehouse database")
-            return None
-            
-        cursor = conn.cursor()
-        ensure_table_exists(cursor, columns)
-        
-        term_id_idx = headers.index('Term Id')
-        college_id_idx = headers.index('College Id')
-        
-        # Collect all unique (Term Id, College Id) pairs in the file
-        unique_pairs = set()
-        term_id_for_folder = None
-        for row in reader:
-            term_id = row[term_id_idx].strip()
-            college_id = row[college_id_idx].strip()
-            unique_pairs.add((term_id, college_id))
-            if term_id_for_folder is None:
-                term_id_for_folder = term_id
+            raise ConnectionError("Failed to connect to Data Warehouse database")
         
-        # Reset reader to beginning after collecting pairs
-        csvfile.seek(0)
-        next(reader)  # skip header again
+        try:
+            with file_metrics.phase("hash file"):
+                content_hash = file_sha256(file_path)
+            loaded_before = find_load(conn, TABLE_NAME, content_hash)
+            if loaded_before:
+                logging.info(f"{file_path.name} is already the current load of REPORT_NO={report_no} "
+                             f"({loaded_before['file']}, {loaded_before['loaded_at']}); skipping load.")
+                log_action(f"{file_path.name} is already the current load of REPORT_NO={report_no}; skipping load.")
+            else:
+                # Single pass over the file: build the frame and collect the delete keys together
+                with file_metrics.phase("read"):
+                    with open(file_path, newline='', encoding='utf-8-sig') as csvfile:
+                        columns, frame, unique_pairs, term_id_for_folder = read_report(
+                            csvfile, report_no, activity_date, resume_line, rejects
+                        )
+                malformed = rejects.count
+                file_metrics.rejected += malformed
+                if malformed:
+                    logging.warning(f"{malformed} row(s) of {file_path.name} do not have one field per header and were not loaded")
+                    log_action(f"{malformed} row(s) of {file_path.name} do not have one field per header and were not loaded")
+                
+                if checkpoint:
+                    with open(CHECKPOINT_FILE, "w") as cp:
+                        cp.write(f"{file_path},0\n")
+                rejected = load_report(conn, file_path, report_no, columns, frame, unique_pairs, file_metrics,
+                                       content_hash, started, rejects, prepared=prepared)
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            # Returns the session to the pool
+            conn.close()
+            rejects.close()
         
-        for term_id, college_id in unique_pairs:
-            cursor.execute(f"DELETE FROM {TABLE_NAME} WHERE REPORT_NO = :1 AND TERM_ID = :2 AND COLLEGE_ID = :3", [report_no, term_id, college_id])
-            logging.info(f"Deleted existing records for REPORT_NO={report_no}, TERM_ID={term_id}, COLLEGE_ID={college_id}")
-            log_action(f"Deleted existing records for REPORT_NO={report_no}, TERM_ID={term_id}, COLLEGE_ID={college_id}")
-        conn.commit()
+        if rejected:
+            logging.warning(f"{rejected} row(s) of {file_path.name} were rejected by Oracle and not loaded")
+            log_action(f"{rejected} row(s) of {file_path.name} were rejected by Oracle and not loaded")
+        if rejects.count:
+            log_action(f"{file_path.name}: {rejects.summary()}")
+    except Exception as e:
+        file_metrics.fail(e)
+        file_metrics.finish()
+        raise
+    file_metrics.finish()
         
-        # Now insert with activity date at the end
-        rows = []
-        for i, row in enumerate(reader):
-            if i < resume_line:
-                continue
-            # Add REPORT_NO at beginning and ACTIVITY_DATE at the end
-            rows.append([report_no] + row + [activity_date])
-            if len(rows) >= 1000:
-                insert_rows(cursor, columns, rows)
-                conn.commit()
-                rows = []
-                with open(CHECKPOINT_FILE, "w") as cp:
-                    cp.write(f"{file_path},{i}\n")
-                    
-        if rows:
-            insert_rows(cursor, columns, rows)
-            conn.commit()
-            
-        cursor.close()
-        conn.close()
-        
-    logging.info(f"Loaded {file_path.name} into {TABLE_NAME} with activity date {activity_date}")
-    log_action(f"Loaded {file_path.name} into {TABLE_NAME} with activity date {activity_date}")
+    if not loaded_before:
+        logging.info(f"Loaded {file_path.name} into {TABLE_NAME} with activity date {activity_date}")
+        log_action(f"Loaded {file_path.name} into {TABLE_NAME} with activity date {activity_date}")
     return term_id_for_folder
 
+def complete_file(file):
+    shutil.move(str(file), COMPLETED_DIR / file.name)
+    logging.info(f"Moved {file.name} to completed folder.")
+    log_action(f"Moved {file.name} to completed folder.")
+
+def load_with_retry(file):
+    """Load one report in its own transaction, retrying transient Oracle errors, then move it to completed."""
+    for attempt in range(1, RETRIES + 1):
+        try:
+            logging.info(f"Processing {file.name} (attempt {attempt} of {RETRIES})...")
+            log_action(f"Processing {file.name} (attempt {attempt} of {RETRIES})...")
+            process_file(file, checkpoint=False, prepared=True)
+            break
+        except Exception as e:
+            transient = is_transient_error(e) or isinstance(e, ConnectionError)
+            if not transient or attempt == RETRIES:
+                raise
+            delay = RETRY_DELAY * attempt
+            logging.warning(f"Transient error loading {file.name}: {e}; retrying in {delay:.0f}s")
+            log_action(f"Transient error loading {file.name}: {e}; retrying in {delay:.0f}s")
+            time.sleep(delay)
+    complete_file(file)
+
+def run_concurrent(files, workers):
+    """Load several reports at once over a small shared pool; a failed report does not stop the others."""
+    workers = max(1, min(workers, len(files)))
+    if get_pool("dwh", pool_min=1, pool_max=workers, pool_inc=1) is None:
+        raise ConnectionError("Could not create DWH connection pool")
+    warm_up("dwh", workers)
+    # Table DDL mid-run would wait on the workers' open deletes and inserts (ORA-00054)
+    prepare_for_reports(files, workers)
+    logging.info(f"Concurrent mode: {len(files)} report(s) across {workers} worker(s)")
+    log_action(f"Concurrent mode: {len(files)} report(s) across {workers} worker(s)")
+    # Largest reports first so the longest load starts right away
+    files = sorted(files, key=lambda f: f.stat().st_size, reverse=True)
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(load_with_retry, file): file for file in files}
+        for future in as_completed(futures):
+            file = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Error processing {file.name}: {e}")
+                log_action(f"Error processing {file.name}: {e}")
+                failed.append(file)
+    return failed
+
 def main():
     # Check if data directory exists and has files
     if not DATA_DIR.exists():
@@ -191,6 +501,16 @@ def main():
     print(f"Writing to: Data Warehouse database")
     print(f"Completed files moved to: data/error_report_loader/completed")
     
+    if WORKERS > 1 and len(files) > 1:
+        # Each report commits on its own here, so there is nothing to resume from
+        if CHECKPOINT_FILE.exists():
+            CHECKPOINT_FILE.unlink()
+        failed = run_concurrent(files, WORKERS)
+        if failed:
+            logging.error(f"{len(failed)} report(s) failed and were left in pending: {', '.join(f.name for f in failed)}")
+            log_action(f"{len(failed)} report(s) failed and were left in pending: {', '.join(f.name for f in failed)}")
+        files = []
+    
     for file in files:
         if resume_file and str(file) != resume_file:
             continue
@@ -201,9 +521,7 @@ def main():
             process_file(file, resume_line=start_line)
             
             # --- Move file directly to completed folder ---
-            shutil.move(str(file), COMPLETED_DIR / file.name)
-            logging.info(f"Moved {file.name} to completed folder.")
-            log_action(f"Moved {file.name} to completed folder.")
+            complete_file(file)
                 
             if CHECKPOINT_FILE.exists():
                 CHECKPOINT_FILE.unlink()
@@ -214,6 +532,13 @@ def main():
             log_action(f"Error processing {file.name}: {e}")
             break  # Stop on error so you can resume later
     
+    STATS.gather()
+    for line in METRICS.finish():
+        logging.info(line)
+    logging.info(f"Metrics written to {METRICS_FILE}")
+    for line in STATS.wait():
+        log_action(line)
+
     print("\nError report loading completed successfully")
     print("Files processed and moved to completed folder")
 
@@ -16,11 +16,20 @@ import os
 import sys
 import re
 import argparse
+import json
+import shutil
+from array import array
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 from collections import defaultdict
+import numpy as np
 import questionary
 from datetime import datetime
 
+# Add the parent directory to Python path so we can import from libs
+sys.path.append(str(Path(__file__).parent.parent))
+from libs.load_ledger import file_sha256
+
 BASE_DIR = os.environ.get("MIS_INSTANCE_PATH", os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 MASTER_LOG = os.path.join(BASE_DIR, "mis-cli.log")
 HISTORY_LOG = os.path.join(BASE_DIR, "history.log")
@@ -41,87 +50,150 @@ def find_error_reports(error_reports_dir):
     error_files = list(error_reports_dir.glob("error_*.csv"))
     return sorted(error_files)
 
-def process_marked_error_report(csv_file, strip_column="STRIP"):
-    """Extract records marked for stripping by analysts."""
-    print(f"Processing marked error report: {csv_file.name}")
-    log_action(f"Processing marked error report: {csv_file.name}")
-    
-    file_type_records = defaultdict(set)
-    total_rows = 0
-    marked_rows = 0
-    
-    try:
-        with open(csv_file, 'r', encoding='utf-8-sig') as f:
-            # Try to detect if it's a CSV with headers
-            sample = f.read(1024)
-            f.seek(0)
-            
-            # Check if first row contains expected headers
-            first_line = f.readline().strip()
-            f.seek(0)
-            
-            has_headers = any(header in first_line.upper() for header in 
-                            ['ERROR TYPE', 'FILE TYPE', 'RECORD NUMBER', 'STRIP'])
-            
-            reader = csv.reader(f)
-            
-            if has_headers:
-                headers = next(reader)
-                # Find column indices
-                try:
-                    error_type_idx = next(i for i, h in enumerate(headers) if 'ERROR TYPE' in h.upper())
-                    file_type_idx = next(i for i, h in enumerate(headers) if 'FILE TYPE' in h.upper())
-                    record_num_idx = next(i for i, h in enumerate(headers) if 'RECORD NUMBER' in h.upper())
-                    strip_idx = next(i for i, h in enumerate(headers) if strip_column.upper() in h.upper())
-                except StopIteration:
-                    print(f"Error: Required columns not found in {csv_file.name}")
-                    log_action(f"Error: Required columns not found in {csv_file.name}")
-                    print(f"Expected columns: Error Type, File Type, Record Number, {strip_column}")                    
-                    log_action(f"Expected columns: Error Type, File Type, Record Number, {strip_column}")
-                    return {}, 0, 0
-            else:
-                # Assume standard positions if no headers
-                error_type_idx, file_type_idx, record_num_idx = 2, 3, 4
-                strip_idx = 5  # Assume STRIP column is 6th column (index 5)
-            
-            for row in reader:
-                total_rows += 1
-                
-                # Skip if not enough columns
-                if len(row) <= max(error_type_idx, file_type_idx, record_num_idx, strip_idx):
-                    continue
-                
-                # Check if marked for stripping
-                strip_value = row[strip_idx].strip().upper()
-                if strip_value not in ['Y', 'YES', '1', 'TRUE']:
-                    continue
-                
-                marked_rows += 1
-                file_type = row[file_type_idx].strip().upper()
-                record_number = row[record_num_idx].strip()
-                
-                if file_type and record_number.isdigit():
-                    # Consolidate XE/XF into XB
-                    if file_type in ['XE', 'XF']:
-                        file_type = 'XB'
-                    
-                    file_type_records[file_type].add(int(record_number))
-        
-        print(f"  Found {marked_rows} records marked for stripping out of {total_rows} total rows")
-        log_action(f"  Found {marked_rows} records marked for stripping out of {total_rows} total rows")
-        if file_type_records:
-            print(f"  File types to process: {', '.join(sorted(file_type_records.keys()))}")
-            log_action(f"  File types to process: {', '.join(sorted(file_type_records.keys()))}")
-            for file_type, records in file_type_records.items():
-                print(f"    {file_type}: {len(records)} records")
-                log_action(f"    {file_type}: {len(records)} records")
-        
-        return file_type_records, total_rows, marked_rows
-        
-    except Exception as e:
-        print(f"Error processing {csv_file.name}: {e}")
-        log_action(f"Error processing {csv_file.name}: {e}")
-        return {}, 0, 0
+# Sidecar indexes of error reports, keyed by the report's content hash
+INDEX_DIR = Path(BASE_DIR) / "error_stripper" / "index"
+INDEX_VERSION = 2
+STRIP_VALUES = ('Y', 'YES', '1', 'TRUE')
+
+class ReportIndex:
+    """
+    An error report held as columns, with the row numbers of every
+    (Error Type, File Type) pair, so menus, counts and the strip set are
+    answered without re-reading the CSV.
+    """
+
+    def __init__(self, fieldnames, columns, strip_column):
+        self.strip_column = strip_column
+        self.fieldnames = list(fieldnames)
+        self.columns = columns                      # one list of values per field
+        if not any(strip_column.upper() in name.upper() for name in self.fieldnames):
+            self.fieldnames.append(strip_column)
+            self.columns.append([''] * len(self))
+        self.strip_idx = next(i for i, name in enumerate(self.fieldnames) if strip_column.upper() in name.upper())
+
+        error_types = self._column('ERROR TYPE')
+        file_types = self._column('FILE TYPE')
+        record_numbers = self._column('RECORD NUMBER')
+        groups = defaultdict(list)
+        for row, key in enumerate(zip((v.strip() for v in error_types), (v.strip() for v in file_types))):
+            groups[key].append(row)
+        self.groups = {key: array('I', rows) for key, rows in groups.items()}
+        # DAT file type (XE/XF records live in the XB file) and record number of every row; -1 when not a number
+        self.dat_types = [('XB' if t in ('XE', 'XF') else t) for t in (v.strip().upper() for v in file_types)]
+        self.record_numbers = array('q', (int(v) if v.isdigit() else -1 for v in (v.strip() for v in record_numbers)))
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def _column(self, name):
+        for i, field in enumerate(self.fieldnames):
+            if name in field.upper():
+                return self.columns[i]
+        return [''] * len(self)
+
+    def error_type_counts(self):
+        """{error type: rows}, sorted by error type."""
+        counts = defaultdict(int)
+        for (error_type, _), rows in self.groups.items():
+            if error_type:
+                counts[error_type] += len(rows)
+        return dict(sorted(counts.items()))
+
+    def file_type_counts(self, error_types):
+        """{file type: rows} among the given error types, sorted by file type."""
+        error_types = set(error_types)
+        counts = defaultdict(int)
+        for (error_type, file_type), rows in self.groups.items():
+            if error_type in error_types and file_type:
+                counts[file_type] += len(rows)
+        return dict(sorted(counts.items()))
+
+    def select(self, error_types, file_types):
+        """Row numbers of the given error types and file types."""
+        rows = []
+        for error_type in error_types:
+            for file_type in file_types:
+                rows.extend(self.groups.get((error_type, file_type), ()))
+        return rows
+
+    def mark(self, rows):
+        """Set the strip flag on rows; returns how many were marked."""
+        flags = self.columns[self.strip_idx]
+        for row in rows:
+            flags[row] = 'Y'
+        return len(rows)
+
+    def records_to_strip(self):
+        """({DAT file type: set of record numbers}, rows marked) for every row flagged for stripping."""
+        file_type_records = defaultdict(set)
+        marked = 0
+        for row, flag in enumerate(self.columns[self.strip_idx]):
+            if flag.strip().upper() not in STRIP_VALUES:
+                continue
+            marked += 1
+            if self.dat_types[row] and self.record_numbers[row] >= 0:
+                file_type_records[self.dat_types[row]].add(self.record_numbers[row])
+        return file_type_records, marked
+
+    def write_csv(self, csv_file):
+        with open(csv_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.fieldnames)
+            writer.writerows(zip(*self.columns))
+
+def build_report_index(csv_file, strip_column="STRIP"):
+    """Parse an error report once into a ReportIndex."""
+    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        fieldnames = next(reader, [])
+        width = len(fieldnames)
+        rows = [row if len(row) == width else (row + [''] * width)[:width] for row in reader]
+    # Transpose to one list per column
+    columns = [list(col) for col in zip(*rows)] if rows else [[] for _ in fieldnames]
+    return ReportIndex(fieldnames, columns, strip_column)
+
+def _sidecar_path(csv_file, strip_column):
+    content_hash = file_sha256(csv_file)
+    return INDEX_DIR / f"{csv_file.stem}.{content_hash[:16]}.{strip_column.upper()}.json"
+
+def save_report_index(csv_file, index):
+    """
+    Write the index's sidecar under the report's current content hash.
+
+    Call it again after write_csv: the rewritten report has a new hash, and
+    an index filed under the old one would never be found.
+    """
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    # Indexes of earlier versions of this report can no longer match (.pkl: older format)
+    for pattern in (f"{csv_file.stem}.*.json", f"{csv_file.stem}.*.pkl"):
+        for old in INDEX_DIR.glob(pattern):
+            old.unlink()
+    sidecar = _sidecar_path(csv_file, index.strip_column)
+    with open(sidecar, 'w', encoding='utf-8') as f:
+        json.dump({"version": INDEX_VERSION, "fieldnames": index.fieldnames, "columns": index.columns}, f)
+
+def load_report_index(csv_file, strip_column="STRIP"):
+    """
+    ReportIndex for an error report, read from its sidecar when the report's
+    content has not changed since the index was saved.
+
+    The sidecar is plain JSON with the report's fields and columns; the
+    groups are rebuilt from them, which costs far less than parsing the CSV.
+    """
+    sidecar = _sidecar_path(csv_file, strip_column)
+    if sidecar.exists():
+        try:
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                log_action(f"Using cached index of {csv_file.name}")
+                return ReportIndex(data["fieldnames"], data["columns"], strip_column)
+        except Exception as e:
+            log_action(f"Ignoring unreadable index {sidecar.name}: {e}")
+    index = build_report_index(csv_file, strip_column)
+    save_report_index(csv_file, index)
+    log_action(f"Indexed {len(index)} rows of {csv_file.name}")
+    return index
 
 def find_dat_files(input_dat_dir):
     """Find all DAT files in the input directory."""
@@ -138,35 +210,131 @@ def find_dat_files(input_dat_dir):
     
     return dat_files
 
+# Bytes read and written per step when stripping; large blocks keep the copy at disk speed
+STRIP_BLOCK_BYTES = 8 * 1024 * 1024
+# ASCII letters by byte value: a DAT record starts with a two-letter record type
+_LETTER = np.zeros(256, dtype=bool)
+_LETTER[ord('A'):ord('Z') + 1] = True
+_LETTER[ord('a'):ord('z') + 1] = True
+
+def is_record(line):
+    """True for a DAT line that counts as a record: its first two bytes are ASCII letters."""
+    return len(line) >= 2 and line[0:2].isalpha()
+
+def count_records(dat_file):
+    """Records of a DAT file, counted line by line like the TX file expects."""
+    with open(dat_file, 'rb') as f:
+        return sum(1 for line in f if is_record(line))
+
+def _line_starts(data, ends, line, at_line_start):
+    """Offsets in a block where lines start, and the number of the first of those lines."""
+    starts = ends + 1
+    if at_line_start:
+        starts = np.concatenate((np.zeros(1, dtype=starts.dtype), starts))
+    starts = starts[starts < len(data)]
+    return starts, (line if at_line_start else line + 1)
+
+def _pending_line(data, ends, line, at_line_start):
+    """The line starting on a block's last byte, as (line, first byte is a letter), or None."""
+    starts, first = _line_starts(data, ends, line, at_line_start)
+    if len(starts) and int(starts[-1]) == len(data) - 1:
+        return first + len(starts) - 1, bool(_LETTER[data[-1]])
+    return None
+
+def _kept_records(data, ends, line, at_line_start, pending, targets, target_array):
+    """Records (see is_record) starting in this block, plus a pending one, that are not removed."""
+    letter = _LETTER[data]
+    kept = 0
+    if pending is not None:
+        number, first_letter = pending
+        i = bisect_left(targets, number)
+        if first_letter and letter[0] and not (i < len(targets) and targets[i] == number):
+            kept += 1
+    starts, first = _line_starts(data, ends, line, at_line_start)
+    full = starts[starts + 1 < len(data)]
+    numbers = first + np.flatnonzero(letter[full] & letter[full + 1])
+    if len(numbers):
+        nearby = target_array[bisect_left(targets, int(numbers[0])):bisect_right(targets, int(numbers[-1]))]
+        kept += len(numbers) - int(np.isin(numbers, nearby).sum())
+    return kept
+
 def strip_records_from_dat(input_file, output_file, records_to_remove):
-    """Remove specified record numbers from DAT file."""
-    if not records_to_remove:
-        # No records to remove, just copy the file
-        import shutil
-        shutil.copy2(input_file, output_file)
-        return 0
-    
-    removed_count = 0
-    
+    """
+    Remove specified record numbers (1-based lines) from a DAT file.
+
+    Works on bytes without decoding: the record numbers are sorted once, the
+    newline offsets of each block are found with one vectorized scan, and
+    the byte ranges between removed records are copied unchanged, so \r\n
+    endings and any non-UTF-8 bytes are kept exactly.
+
+    Returns (lines removed, records written), where records written are
+    the kept lines that count as records for the TX file (see is_record);
+    blank, Ctrl-Z and other non-record lines are copied but not counted.
+    Record numbers past the end of the file are ignored. On an error the
+    partial output is deleted and None is returned.
+    """
+    targets = sorted(records_to_remove)
+    target_array = np.array(targets, dtype=np.int64)
+    removed = 0
+    written = 0
+    line = 1            # number of the record that contains the block's first byte
+    at_line_start = True
+    tail_removed = False
+    tail_bytes = 0      # bytes of the current record seen since its last newline
+    pending = None      # (line, first byte is a letter) of a line whose second byte is in the next block
+    outfile = None
+
     try:
-        with open(input_file, 'r', encoding='utf-8') as infile, \
-             open(output_file, 'w', encoding='utf-8') as outfile:
-            
-            for line_num, line in enumerate(infile, 1):
-                if line_num in records_to_remove:
-                    removed_count += 1
-                else:
-                    outfile.write(line)
-        
-        return removed_count
-        
+        with open(input_file, 'rb') as infile, open(output_file, 'wb') as outfile:
+            while True:
+                block = infile.read(STRIP_BLOCK_BYTES)
+                if not block:
+                    break
+                view = memoryview(block)
+                data = np.frombuffer(block, dtype=np.uint8)
+                ends = np.flatnonzero(data == 0x0A)
+                complete = len(ends)
+                written += _kept_records(data, ends, line, at_line_start, pending, targets, target_array)
+                pending = _pending_line(data, ends, line, at_line_start)
+                at_line_start = bool(complete) and int(ends[-1]) == len(block) - 1
+                # Records line .. line + complete - 1 end in this block; line + complete runs past it
+                lo = bisect_left(targets, line)
+                hi = bisect_right(targets, line + complete)
+                pos = 0
+                for record in targets[lo:hi]:
+                    j = record - line
+                    start = int(ends[j - 1]) + 1 if j else 0
+                    end = int(ends[j]) + 1 if j < complete else len(block)
+                    outfile.write(view[pos:start])
+                    pos = end
+                    if j < complete:
+                        removed += 1
+                outfile.write(view[pos:])
+                tail_removed = hi > lo and targets[hi - 1] == line + complete
+                tail_bytes = len(block) - int(ends[-1]) - 1 if complete else tail_bytes + len(block)
+                line += complete
+        # A last record without a trailing newline
+        if tail_bytes and tail_removed:
+            removed += 1
+        shutil.copystat(input_file, output_file)
+        return removed, written
+
     except Exception as e:
         print(f"    Error processing {input_file.name}: {e}")
         log_action(f"    Error processing {input_file.name}: {e}")
-        return 0
-
-def generate_tx_file(target_dir, term):
-    """Generate a TX file with record counts after all other files are processed"""
+        # A truncated DAT must not be shipped or counted in the TX file
+        if outfile is not None and os.path.exists(output_file):
+            os.remove(output_file)
+        return None
+
+def generate_tx_file(target_dir, term, record_counts=None):
+    """
+    Generate a TX file with record counts after all other files are processed.
+
+    record_counts maps DAT file names to the record counts the stripper
+    produced while writing them; other files are counted by reading them.
+    """
+    record_counts = record_counts or {}
     tx_file = f"U86{term}TX.dat"
     tx_path = os.path.join(target_dir, tx_file)
     tx_records = []
@@ -184,13 +352,9 @@ def generate_tx_file(target_dir, term):
             file_path = os.path.join(target_dir, filename)
 
             # Count total records in the file (across all colleges)
-            total_count = 0
-
-            with open(file_path, 'r') as file:
-                for line in file:
-                    # Count any valid record line (starts with alphabetic prefix)
-                    if len(line) >= 2 and line[0:2].isalpha():
-                        total_count += 1
+            total_count = record_counts.get(filename)
+            if total_count is None:
+                total_count = count_records(file_path)
 
             # Create a TX record for this file type using 860 as the district code
             target_filename = f"U86{term}{file_type}DAT"
@@ -298,30 +462,24 @@ def main():
     print(f"Processing {selected_file.name}...")
     log_action(f"Processing {selected_file.name}...")
 
-    # Read CSV into list of dicts
-    with open(selected_file, 'r', encoding='utf-8-sig') as f:
-        reader = list(csv.DictReader(f))
-        fieldnames = reader[0].keys() if reader else []
-
-    # Add STRIP column if missing
-    if 'STRIP' not in fieldnames:
-        fieldnames = list(fieldnames) + ['STRIP']
-        for row in reader:
-            row['STRIP'] = ''
+    # One parse (or a cached index) serves the menus, the marking and the strip set
+    report = load_report_index(selected_file, args.strip_column)
 
     # Interactive selection loop
     while True:
         # 1. Prompt for Error Type
-        error_types = sorted({row['Error Type'].strip() for row in reader if row.get('Error Type', '').strip()})
-        if not error_types:
+        error_counts = report.error_type_counts()
+        if not error_counts:
             print("No Error Types found in the error report.")
             log_action("No Error Types found in the error report.")
             return 0
+        error_types = list(error_counts)
         print("Tip: Press Enter with nothing selected to go back to the previous menu.")
         log_action("Tip: Press Enter with nothing selected to go back to the previous menu.")
         selected_error_types = questionary.checkbox(
             "Select Error Type(s) to process:",
-            choices=["ALL"] + error_types
+            choices=["ALL"] + [questionary.Choice(f"{name} ({count} rows)", value=name)
+                               for name, count in error_counts.items()]
         ).ask()
         if not selected_error_types:
             print("No Error Type selected. Exiting.")
@@ -331,16 +489,18 @@ def main():
             selected_error_types = error_types
 
         # 2. Prompt for File Type (filtered by Error Type)
-        file_types = sorted({row['File Type'].strip() for row in reader if row.get('Error Type', '').strip() in selected_error_types and row.get('File Type', '').strip()})
-        if not file_types:
+        file_counts = report.file_type_counts(selected_error_types)
+        if not file_counts:
             print("No File Types found for the selected Error Type(s). Exiting.")
             log_action("No File Types found for the selected Error Type(s). Exiting.")
             return 0
+        file_types = list(file_counts)
         print("Tip: Press Enter with nothing selected to go back to the previous menu.")
         log_action("Tip: Press Enter with nothing selected to go back to the previous menu.")
         selected_file_types = questionary.checkbox(
             "Select File Type(s) to process:",
-            choices=["ALL"] + file_types
+            choices=["ALL"] + [questionary.Choice(f"{name} ({count} rows)", value=name)
+                               for name, count in file_counts.items()]
         ).ask()
         if not selected_file_types:
             print("No File Type selected. Exiting.")
@@ -349,6 +509,8 @@ def main():
         if "ALL" in selected_file_types:
             selected_file_types = file_types
 
+        print(f"{len(report.select(selected_error_types, selected_file_types))} row(s) will be marked for stripping.")
+
         # 3. Confirm
         confirm = questionary.select(
             "Proceed with stripping?",
@@ -363,29 +525,18 @@ def main():
             log_action("Operation cancelled by user.")
             return 0
 
-    # Mark STRIP='Y' for selected rows
-    marked_rows = 0
-    for row in reader:
-        if row.get('Error Type', '').strip() in selected_error_types and row.get('File Type', '').strip() in selected_file_types:
-            row['STRIP'] = 'Y'
-            marked_rows += 1
-
-    # Write back to CSV (overwrite)
-    with open(selected_file, 'w', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(reader)
+    # Mark STRIP='Y' for selected rows and write the report back (overwrite)
+    marked_rows = report.mark(report.select(selected_error_types, selected_file_types))
+    report.write_csv(selected_file)
+    save_report_index(selected_file, report)
 
     print(f"\nMarked {marked_rows} records for stripping in {selected_file.name}.")
     log_action(f"\nMarked {marked_rows} records for stripping in {selected_file.name}.")
 
     # Now proceed with the rest of the stripping logic as before
-    all_records_to_strip = defaultdict(set)
-    file_records, total_rows, marked_rows2 = process_marked_error_report(
-        selected_file, args.strip_column)
-    total_marked = marked_rows2
-    for file_type, records in file_records.items():
-        all_records_to_strip[file_type].update(records)
+    all_records_to_strip, total_marked = report.records_to_strip()
+    print(f"  Found {total_marked} records marked for stripping out of {len(report)} total rows")
+    log_action(f"  Found {total_marked} records marked for stripping out of {len(report)} total rows")
 
     if not all_records_to_strip:
         print(f"\nNo records marked for stripping found in {selected_file.name}.")
@@ -416,6 +567,7 @@ def main():
     log_action(f"\nProcessing files...")
     total_removed = 0
     processed_files = 0
+    record_counts = {}
 
     for file_type, records_to_remove in all_records_to_strip.items():
         if file_type not in available_dat_files:
@@ -431,10 +583,16 @@ def main():
         print(f"    Removing {len(records_to_remove)} records...")
         log_action(f"    Removing {len(records_to_remove)} records...")
 
-        removed = strip_records_from_dat(input_file, output_file, records_to_remove)
+        result = strip_records_from_dat(input_file, output_file, records_to_remove)
+        if result is None:
+            print(f"    {input_file.name} was not written; fix the error and run the stripper again")
+            log_action(f"    {input_file.name} was not written; fix the error and run the stripper again")
+            continue
+        removed, written = result
+        record_counts[output_file.name] = written
 
-        print(f"    Removed {removed} records → {output_file.name}")
-        log_action(f"    Removed {removed} records → {output_file.name}")
+        print(f"    Removed {removed} records → {output_file.name} ({written} records)")
+        log_action(f"    Removed {removed} records → {output_file.name} ({written} records)")
         total_removed += removed
         processed_files += 1
 
@@ -443,8 +601,11 @@ def main():
         if file_type not in all_records_to_strip:
             output_file = args.output / dat_file.name
             if not output_file.exists():
-                import shutil
-                shutil.copy2(dat_file, output_file)
+                # The same byte copy as a strip with nothing removed, counting records on the way
+                result = strip_records_from_dat(dat_file, output_file, ())
+                if result is None:
+                    continue
+                record_counts[output_file.name] = result[1]
                 print(f"  Copied {file_type}: {dat_file.name} (no errors to strip)")
                 log_action(f"  Copied {file_type}: {dat_file.name} (no errors to strip)")
                 processed_files += 1
@@ -467,7 +628,7 @@ def main():
         match = re.match(r'U86([A-Z0-9]{3})[A-Z]{2}\.dat$', dat_files[0].name, re.IGNORECASE)
         if match:
             term = match.group(1)
-            generate_tx_file(str(args.output), term)
+            generate_tx_file(str(args.output), term, record_counts)
         else:
             print("Could not infer term code from DAT filenames. TX file not generated.")
             log_action("Could not infer term code from DAT filenames. TX file not generated.")
@@ -1,9 +1,10 @@
 import sys
 import os
 from pathlib import Path
-import pandas as pd
 import glob
 import shutil
+import time
+from contextlib import closing
 from datetime import datetime
 
 BASE_DIR = os.environ.get("MIS_INSTANCE_PATH", os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -21,12 +22,22 @@ def log_action(action):
 # Add the parent directory to Python path so we can import from libs
 sys.path.append(str(Path(__file__).parent.parent))
 from libs.oracle_db_connector import get_connection
+from libs.load_metrics import LoadMetrics
+from libs.batch_tuner import BatchTuner, estimate_row_bytes
+from libs.schema_cache import table_exists, table_column_types, invalidate
+from libs.load_ledger import file_sha256, find_load, record_load
+from libs.table_stats import PostLoadStats
+from libs.tabular_io import read_chunks, insert_frame
+from libs.schema_inference import infer_column_types, convert_frame, column_widths, widen_to, can_need_widening
 
 # Correct data paths: mis-cli/data/sg_loader/input and completed
 data_dir = Path(BASE_DIR) / "sg_loader"
 input_folder = data_dir / "input"
 completed_folder = data_dir / "completed"
+log_folder = data_dir / "log"
 os.makedirs(completed_folder, exist_ok=True)
+os.makedirs(log_folder, exist_ok=True)
+metrics_file = log_folder / f"sg26_sg29_loader_{datetime.now().strftime('%Y%m%d_%H%M%S')}.metrics.jsonl"
 
 # Patterns for both SG26 and SG29, CSV and XLSX
 patterns = [
@@ -36,28 +47,29 @@ patterns = [
     str(input_folder / "*SG29*.xlsx"),
 ]
 
-def table_exists(cur, table_name):
-    cur.execute(
-        "SELECT COUNT(*) FROM user_tables WHERE table_name = :tbl",
-        {"tbl": table_name.upper()}
-    )
-    return cur.fetchone()[0] > 0
+# Campus/term keys stay text so the per-file delete compares them as strings
+KEY_COLUMNS = ("GI01_DISTRICT_COLLEGE_ID", "GI03_TERM_ID")
 
-def create_table(cur, table_name, columns):
-    col_defs = ', '.join([f'"{col}" VARCHAR2(4000)' for col in columns])
+def create_table(cur, table_name, columns, sample):
+    # VARCHAR2 sizes come from the first chunk of the first file, NUMBER/DATE from overrides (see libs/schema_inference.py)
+    types = infer_column_types(table_name.upper(), sample, columns, text_columns=KEY_COLUMNS)
+    col_defs = ', '.join([f'"{col}" {types[col]}' for col in columns])
     sql = f'CREATE TABLE "{table_name.upper()}" ({col_defs})'
     cur.execute(sql)
+    invalidate(table_name)
     print(f"🆕 Created table {table_name}")
     log_action(f"Created table {table_name}")
     
 log_action("===== SG26/SG29 Loader script started =====")
 
-conn = get_connection(section="dwh") # Use your actual section name here
+conn = get_connection(section="dwh", use_pool=True) # Use your actual section name here
 if conn is None:
     print("❌ Could not connect to DWH database.") 
     log_action("Could not connect to DWH database.")
     sys.exit(1)
 cur = conn.cursor()
+metrics = LoadMetrics("sg26_sg29_loader", metrics_file)
+stats = PostLoadStats("sg26_sg29_loader")
 
 # Gather all matching files
 input_files = []
@@ -80,49 +92,109 @@ else:
 
         print(f"Processing {filename} ...")
         log_action(f"Processing {filename} ...")
-        # Use appropriate pandas reader
-        if filename.endswith(".csv"):
-            df = pd.read_csv(input_file)
-        elif filename.endswith(".xlsx"):
-            df = pd.read_excel(input_file)
-        else:
-            log_action(f"Skipped unknown file format: {filename}")
+        file_metrics = metrics.start_file(filename, table_name.upper(), os.path.getsize(input_file))
+        file_metrics.start_round_trips(conn)
+        file_started = time.perf_counter()
+        # Skip files whose exact content is already the current load of their campus/term
+        with file_metrics.phase("hash file"):
+            content_hash = file_sha256(input_file)
+        loaded_before = find_load(conn, table_name, content_hash)
+        if loaded_before:
+            print(f"⏭️ {filename} is already loaded into {table_name} for {loaded_before['scope']}; skipping")
+            log_action(f"{filename} is already loaded into {table_name.upper()} for {loaded_before['scope']} ({loaded_before['loaded_at']}); skipping")
+            shutil.move(input_file, os.path.join(completed_folder, filename))
+            log_action(f"Moved {filename} to completed folder")
+            file_metrics.finish(0)
             continue
-
-        if not table_exists(cur, table_name):
-            create_table(cur, table_name, df.columns)
-
-        # Assumes all rows in the file have the same CCC and TTT
-        ccc = str(df['GI01_DISTRICT_COLLEGE_ID'].iloc[0])
-        ttt = str(df['GI03_TERM_ID'].iloc[0])
-
-        # Delete existing records for this campus/term
-        delete_sql = f'''
-            DELETE FROM "{table_name.upper()}"
-            WHERE "GI01_DISTRICT_COLLEGE_ID" = :ccc AND "GI03_TERM_ID" = :ttt
-        '''
-        cur.execute(delete_sql, {"ccc": ccc, "ttt": ttt})
-        print(f"🗑️ Deleted existing records for campus {ccc}, term {ttt}")
-        log_action(f"Deleted existing records for campus {ccc}, term {ttt}")
-
-        # Insert new records
-        cols = ','.join([f'"{col}"' for col in df.columns])
-        placeholders = ','.join([f":{i+1}" for i in range(len(df.columns))])
-        insert_sql = f'INSERT INTO "{table_name.upper()}" ({cols}) VALUES ({placeholders})'
-        cur.executemany(insert_sql, df.values.tolist())
-        print(f"✅ Loaded {len(df)} rows into {table_name}")
-        log_action(f"Loaded {len(df)} rows into {table_name}")
-
-        # Move file to completed and rename based on CCC and TTT
-        ext = ".csv" if filename.endswith(".csv") else ".xlsx"
-        sg_type = "SG26" if table_name == "mis_sg26" else "SG29"
-        new_filename = f"{ccc}_{ttt}_{sg_type}{ext}"
-        dest_file = os.path.join(completed_folder, new_filename)
-        shutil.move(input_file, dest_file)
-        print(f"Moved and renamed {filename} to {new_filename}.")
-        log_action(f"Moved and renamed {filename} to {new_filename}.")
-
+        try:
+            # Stream the file in chunks so memory stays flat for large extracts
+            with closing(read_chunks(input_file)) as chunks:
+                with file_metrics.phase("read"):
+                    df = next(chunks, None)
+                if df is None:
+                    log_action(f"Skipped {filename}: no data rows")
+                    file_metrics.fail("no data rows")
+                    file_metrics.finish()
+                    continue
+                columns = df.columns
+
+                with file_metrics.phase("prepare"):
+                    if not table_exists(cur, table_name):
+                        create_table(cur, table_name, columns, df)
+                    # DDL commits, so size the columns for the whole file before its delete;
+                    # that needs a full read only when some field is wider than its column
+                    if can_need_widening(table_column_types(cur, table_name), input_file, columns):
+                        widths = column_widths(df, columns)
+                        with closing(read_chunks(input_file)) as rest:
+                            next(rest, None)
+                            for chunk in rest:
+                                column_widths(chunk, columns, widths)
+                        if widen_to(cur, table_name.upper(), widths, quote=True):
+                            log_action(f"Widened columns of {table_name} for {filename}")
+
+                # Assumes all rows in the file have the same CCC and TTT
+                ccc = str(df['GI01_DISTRICT_COLLEGE_ID'].iloc[0])
+                ttt = str(df['GI03_TERM_ID'].iloc[0])
+
+                # Delete existing records for this campus/term
+                delete_sql = f'''
+                    DELETE FROM "{table_name.upper()}"
+                    WHERE "GI01_DISTRICT_COLLEGE_ID" = :ccc AND "GI03_TERM_ID" = :ttt
+                '''
+                with file_metrics.phase("delete"):
+                    cur.execute(delete_sql, {"ccc": ccc, "ttt": ttt})
+                print(f"🗑️ Deleted existing records for campus {ccc}, term {ttt}")
+                log_action(f"Deleted existing records for campus {ccc}, term {ttt}")
+
+                # Insert new records chunk by chunk
+                cols = ','.join([f'"{col}"' for col in columns])
+                placeholders = ','.join([f":{i+1}" for i in range(len(columns))])
+                insert_sql = f'INSERT INTO "{table_name.upper()}" ({cols}) VALUES ({placeholders})'
+                tuner = BatchTuner(table_name, initial=1000,
+                                   row_bytes=estimate_row_bytes([32] * len(columns)),
+                                   log=log_action)
+                loaded = 0
+                while df is not None:
+                    with file_metrics.phase("convert"):
+                        typed = convert_frame(df, table_column_types(cur, table_name), columns)
+                    loaded += insert_frame(cur, insert_sql, typed, columns, tuner, file_metrics)
+                    with file_metrics.phase("read"):
+                        df = next(chunks, None)
+            print(f"✅ Loaded {loaded} rows into {table_name}")
+            log_action(f"Loaded {loaded} rows into {table_name}")
+            # The ledger entry commits together with this file's delete and inserts
+            with file_metrics.phase("commit"):
+                record_load(conn, table_name, f"{ccc}/{ttt}", content_hash, filename, "sg26_sg29_loader",
+                            loaded, time.perf_counter() - file_started)
+            stats.touch(table_name)
+
+            # Move file to completed and rename based on CCC and TTT
+            ext = ".csv" if filename.endswith(".csv") else ".xlsx"
+            sg_type = "SG26" if table_name == "mis_sg26" else "SG29"
+            new_filename = f"{ccc}_{ttt}_{sg_type}{ext}"
+            dest_file = os.path.join(completed_folder, new_filename)
+            shutil.move(input_file, dest_file)
+            print(f"Moved and renamed {filename} to {new_filename}.")
+            log_action(f"Moved and renamed {filename} to {new_filename}.")
+            file_metrics.stop_round_trips(conn)
+            file_metrics.finish()
+        except Exception as e:
+            # One bad file must not stop the rest: undo its delete/inserts and record it as failed
+            print(f"❌ Error processing {filename}: {e}")
+            log_action(f"Error processing {filename}: {e}")
+            conn.rollback()
+            file_metrics.fail(e)
+            file_metrics.finish()
+
+    commit_started = time.perf_counter()
     conn.commit()
+    stats.gather()
+    for line in metrics.finish(commit_seconds=round(time.perf_counter() - commit_started, 4)):
+        print(line)
+    log_action(f"Metrics written to {metrics_file}")
+    for line in stats.wait():
+        print(line)
+        log_action(line)
 
 cur.close()
 conn.close()
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The loader creates its folders under the instance path and runs on import;
+# with no input files it only logs that there is nothing to load
+os.environ.setdefault("MIS_INSTANCE_PATH", tempfile.mkdtemp(prefix="mis-test-"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import csv_loader  # noqa: E402
+
+
+class FakeCursor:
+    def execute(self, sql, *args, **kwargs):
+        pass
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class FailingCommitConnection:
+    def __init__(self):
+        self.rolled_back = False
+
+    def cursor(self):
+        return FakeCursor()
+
+    def commit(self):
+        raise RuntimeError("ORA-03113: end-of-file on communication channel")
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_loader, "completed_folder", tmp_path / "completed")
+    (tmp_path / "completed").mkdir()
+    monkeypatch.setattr(csv_loader, "find_load", lambda *args: None)
+    monkeypatch.setattr(csv_loader, "table_exists", lambda *args: True)
+    monkeypatch.setattr(csv_loader, "table_column_types", lambda *args: {})
+    monkeypatch.setattr(csv_loader, "insert_frame", lambda cursor, sql, df, *args: len(df))
+
+    def record_load(conn, *args):
+        conn.commit()
+
+    monkeypatch.setattr(csv_loader, "record_load", record_load)
+    return csv_loader
+
+
+def test_failed_commit_publishes_no_annotated_file(loader, tmp_path):
+    input_file = tmp_path / "861_TV_262.csv"
+    input_file.write_text("GI01,GI03,SB00\n861,262,@12345678\n861,262,bad\n", encoding="utf-8")
+    conn = FailingCommitConnection()
+
+    loader.process_file(conn, str(input_file))
+
+    assert conn.rolled_back
+    assert list((tmp_path / "completed").iterdir()) == []
+    # The input stays in place to be loaded again
+    assert input_file.exists()
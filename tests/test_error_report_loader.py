@@ -0,0 +1,61 @@
+import io
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+# The loader creates its folders and log file under the instance path on import
+os.environ.setdefault("MIS_INSTANCE_PATH", tempfile.mkdtemp(prefix="mis-test-"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import error_report_loader  # noqa: E402
+from libs.reject_file import RejectFile  # noqa: E402
+
+
+def sql_binds(sql):
+    """Bind positions the driver expects for a SQL (not PL/SQL) statement.
+
+    Named binds count once however often they appear; every positional
+    placeholder is its own position.
+    """
+    names = []
+    for name in re.findall(r":(\w+)", sql):
+        if name.isdigit() or name not in names:
+            names.append(name)
+    return names
+
+
+def test_delete_binds_match_rows():
+    sql, rows = error_report_loader.delete_reports_statement(7, {("2262", "861"), ("2262", "862")})
+    binds = sql_binds(sql)
+    assert len(rows) == 2
+    for row in rows:
+        assert isinstance(row, dict)
+        assert sorted(binds) == sorted(row)
+    assert rows[0]["report_no"] == "7"
+
+
+def test_delete_uses_key_prefix_and_exact_match():
+    sql, _ = error_report_loader.delete_reports_statement(1, {("2262", "861")})
+    for col in error_report_loader.KEY_COLUMNS:
+        assert f"{error_report_loader.key_expr(col)} = SUBSTR(:{col.lower()}" in sql
+        assert f"{col} = :{col.lower()}" in sql
+
+
+def test_read_report_rejects_malformed_rows(tmp_path):
+    report = io.StringIO("Term Id,College Id,Msg\n2262,861,a\n2262,861\n2262,862,c,extra\n2263,861,d\n")
+    rejects = RejectFile(tmp_path / "rejects.csv", [])
+    columns, frame, pairs, term_id = error_report_loader.read_report(report, 7, "2026-01-01 00:00:00", rejects=rejects)
+    rejects.close()
+    assert columns == ["REPORT_NO", "TERM_ID", "COLLEGE_ID", "MSG", "ACTIVITY_DATE"]
+    assert list(frame.columns) == columns
+    # Frame rows keep their CSV line numbers; the short and long rows are not loaded
+    assert frame.index.tolist() == [2, 5]
+    assert frame["MSG"].tolist() == ["a", "d"]
+    assert pairs == {("2262", "861"), ("2263", "861")}
+    assert term_id == "2262"
+    assert rejects.count == 2
+    lines = (tmp_path / "rejects.csv").read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "LINE,ERROR," + ",".join(columns)
+    assert [line.split(",")[0] for line in lines[1:]] == ["3", "4"]
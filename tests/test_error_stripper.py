@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("questionary")
+
+os.environ.setdefault("MIS_INSTANCE_PATH", tempfile.mkdtemp(prefix="mis-test-"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import error_stripper  # noqa: E402
+
+# Records, a blank line, a CRLF record, a line without the two-letter prefix,
+# trailing blank and Ctrl-Z lines, and a last record without a newline
+DAT = b"SB861262A\n\nSB861262B\r\n12345\nS\nSB861262C\n\n\x1a\nSB861262D"
+
+
+@pytest.mark.parametrize("block_bytes", [1, 2, 3, 7, 1024])
+@pytest.mark.parametrize("remove", [(), (1,), (2, 3), (9, 10)])
+def test_written_count_matches_line_count(tmp_path, monkeypatch, block_bytes, remove):
+    monkeypatch.setattr(error_stripper, "STRIP_BLOCK_BYTES", block_bytes)
+    source = tmp_path / "U86262SB.dat"
+    output = tmp_path / "out" / "U86262SB.dat"
+    output.parent.mkdir()
+    source.write_bytes(DAT)
+
+    removed, written = error_stripper.strip_records_from_dat(source, output, remove)
+
+    lines = DAT.splitlines(keepends=True)
+    kept = [line for number, line in enumerate(lines, 1) if number not in remove]
+    assert output.read_bytes() == b"".join(kept)
+    # Line 10 is past the end of the file
+    assert removed == len([number for number in remove if number <= len(lines)])
+    assert written == error_stripper.count_records(output)
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from libs import schema_inference, tabular_io  # noqa: E402
+
+
+def test_digit_codes_stay_text(monkeypatch, tmp_path):
+    monkeypatch.setattr(schema_inference, "OVERRIDE_DIR", tmp_path)
+    sample = pd.DataFrame({
+        "INFO_1": ["1234567", "7654321"],
+        "GI01": ["861", "862"],
+        "WHEN": ["2025-01-02", "2025-02-03"],
+    })
+    types = schema_inference.infer_column_types("MIS_TEST", sample, list(sample.columns), text_columns=("GI01",))
+    assert types == {"INFO_1": "VARCHAR2(20)", "GI01": "VARCHAR2(100)", "WHEN": "VARCHAR2(20)"}
+    # A later value that is not a number still binds as text
+    later = pd.DataFrame({"INFO_1": ["@00123456"], "GI01": ["861"], "WHEN": ["n/a"]})
+    table_types = {col: ("VARCHAR2", 50) for col in later.columns}
+    assert schema_inference.all_text(table_types, list(later.columns))
+
+
+def test_number_and_date_come_from_overrides(monkeypatch, tmp_path):
+    monkeypatch.setattr(schema_inference, "OVERRIDE_DIR", tmp_path)
+    (tmp_path / "MIS_TEST.txt").write_text("# MIS_TEST\nAMOUNT NUMBER\nWHEN DATE\n", encoding="utf-8")
+    sample = pd.DataFrame({"AMOUNT": ["1.5"], "WHEN": ["2025-01-02"], "NOTE": ["x"]})
+    types = schema_inference.infer_column_types("MIS_TEST", sample, list(sample.columns))
+    assert types == {"AMOUNT": "NUMBER", "WHEN": "DATE", "NOTE": "VARCHAR2(10)"}
+    frame = schema_inference.convert_frame(
+        sample, {"AMOUNT": ("NUMBER", 22), "WHEN": ("DATE", 7), "NOTE": ("VARCHAR2", 10)}, list(sample.columns)
+    )
+    assert frame["AMOUNT"].tolist() == [1.5]
+    assert frame["WHEN"].tolist() == [pd.Timestamp("2025-01-02")]
+
+
+def test_field_widths_bound_what_pandas_reads(tmp_path):
+    path = tmp_path / "MIS_TEST.csv"
+    # Quoted commas and newlines do not split fields; the header is not counted
+    path.write_bytes(b'GI01,NOTE,SB00\r\n861,"a, ""b""\nc",@00000001\r\n8621,x,@1\r\n')
+    widths = tabular_io.field_widths(path, block_bytes=7)
+    assert widths == [4, 12, 10]
+    frame = pd.read_csv(path, dtype=str)
+    for col, width in zip(frame.columns, widths):
+        assert frame[col].str.encode("utf-8").str.len().max() <= width
+
+    columns = ["GI01", "NOTE", "SB00"]
+    fits = {"GI01": ("VARCHAR2", 10), "NOTE": ("VARCHAR2", 20), "SB00": ("VARCHAR2", 10)}
+    assert not schema_inference.can_need_widening(fits, path, columns)
+    assert schema_inference.can_need_widening({**fits, "NOTE": ("VARCHAR2", 10)}, path, columns)
+    # A column the table does not have yet needs the full scan
+    assert schema_inference.can_need_widening({"GI01": ("VARCHAR2", 10)}, path, columns)